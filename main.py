@@ -7,14 +7,20 @@ SmartCutElf - 智剪精灵
 
 import sys
 import os
-from pathlib import Path
+import multiprocessing
+
+# 启动路径在导入时计算一次
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.join(_APP_DIR, 'src')
+# PyInstaller会将临时文件夹路径存储到_MEIPASS
+_BASE_PATH = getattr(sys, '_MEIPASS', _APP_DIR)
 
 # 添加src目录到Python路径
-sys.path.insert(0, str(Path(__file__).parent / 'src'))
+sys.path.insert(0, _SRC_DIR)
 
 import ctypes
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThreadPool, QRunnable
 from PyQt5.QtGui import QIcon
 from ui.main_window import MainWindow
 from utils.logger import setup_logger
@@ -23,9 +29,19 @@ from utils.config import Config
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径（支持PyInstaller打包）"""
-    # PyInstaller会将临时文件夹路径存储到_MEIPASS
-    base_path = getattr(sys, '_MEIPASS', Path(__file__).parent)
-    return str(Path(base_path) / relative_path)
+    return os.path.join(_BASE_PATH, relative_path)
+
+
+class _WhisperWarmup(QRunnable):
+    """后台预加载Whisper模型，与用户选择文件的时间重叠"""
+    
+    def __init__(self, model_size: str):
+        super().__init__()
+        self.model_size = model_size
+    
+    def run(self):
+        from ai.speech_recognition import SpeechRecognizer
+        SpeechRecognizer(self.model_size).preload()
 
 
 def main():
@@ -61,7 +77,7 @@ def main():
     
     # 设置应用图标（全局生效：任务栏、窗口等）
     icon_path = get_resource_path('assets/app_icon.ico')
-    if Path(icon_path).exists():
+    if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
         logger.info(f"应用图标已设置: {icon_path}")
     else:
@@ -73,9 +89,17 @@ def main():
     
     logger.info("应用程序界面已启动")
     
+    # 配置开启预加载且启用字幕时，在后台预热语音识别模型（结果保存在类级缓存中）；
+    # 模型常驻占用数百MB内存，默认不预加载，首次识别时再加载
+    if config.get('speech.preload_model', False) and config.get('subtitle.enabled', True):
+        model_size = config.get('speech.recognition_model', 'base')
+        QThreadPool.globalInstance().start(_WhisperWarmup(model_size))
+    
     # 运行应用
     sys.exit(app.exec_())
 
 
 if __name__ == '__main__':
+    # 打包后的程序启动子进程（如并行TTS）时需要
+    multiprocessing.freeze_support()
     main()
@@ -6,11 +6,23 @@ SmartCutElf 打包脚本
 import os
 import sys
 import shutil
+import argparse
 import subprocess
 import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
+# 大文件复制缓冲区（默认64KB，增大到1MB减少系统调用次数）
+COPY_BUFSIZE = 1024 * 1024
+
+# 生成的spec文件（缓存Analysis结果，增量构建时复用）
+SPEC_FILE = Path('SmartCutElf.spec')
+# 记录上次构建时 requirements.txt 的修改时间
+DEPS_STAMP = Path('build') / '.requirements_mtime'
+
+
 def clean_build_dirs():
     """清理构建目录"""
     print("🧹 清理旧的构建文件...")
@@ -21,18 +33,43 @@ def clean_build_dirs():
             print(f"  ✓ 已删除 {dir_name}/")
 
 
-def build_executable():
-    """打包可执行文件"""
+def dependencies_changed() -> bool:
+    """依赖是否在上次构建后发生变化（requirements.txt 修改时间）"""
+    requirements = Path('requirements.txt')
+    if not requirements.exists() or not DEPS_STAMP.exists():
+        return True
+    try:
+        return float(DEPS_STAMP.read_text().strip()) != requirements.stat().st_mtime
+    except ValueError:
+        return True
+
+
+def _save_deps_stamp():
+    """构建成功后记录依赖文件时间戳"""
+    requirements = Path('requirements.txt')
+    if requirements.exists():
+        DEPS_STAMP.parent.mkdir(parents=True, exist_ok=True)
+        DEPS_STAMP.write_text(str(requirements.stat().st_mtime))
+
+
+def build_executable(clean: bool = True):
+    """
+    打包可执行文件
+    
+    Args:
+        clean: 是否传递--clean（清除PyInstaller缓存，完整重新分析）
+    """
     print("\n🚀 开始打包...")
     print("  💡 优化策略：")
     print("     1. 使用onedir模式（比onefile快20倍+）")
     print("     2. 排除torch（减少1GB，Whisper会自动下载）")
     print("     3. 排除不需要的PyQt5模块")
-    print("     4. 排除测试模块\n")
+    print("     4. 排除测试模块")
+    print("     5. 禁用UPX压缩（加快打包和启动）\n")
     
-    # PyInstaller 参数（优化版）
-    cmd = [
-        'pyinstaller',
+    # PyInstaller 参数（优化版），用于生成spec文件
+    spec_cmd = [
+        'pyi-makespec',
         '--name=SmartCutElf',
         '--windowed',
         
@@ -40,8 +77,8 @@ def build_executable():
         # onedir: 1-3分钟
         # onefile: 10-30分钟
         
-        '--noconfirm',
-        '--clean',
+        # ⚡ 禁用UPX：避免启动时逐个解压DLL（体积稍大，启动更快）
+        '--noupx',
         
         # ⚡ 添加src到路径
         '--paths=src',
@@ -115,13 +152,25 @@ def build_executable():
     
     # Windows/Linux 路径分隔符
     if sys.platform != 'win32':
-        cmd = [arg.replace(';', ':') for arg in cmd]
+        spec_cmd = [arg.replace(';', ':') for arg in spec_cmd]
     
     try:
         start_time = time.time()
         
-        print(f"  ⏳ 打包中...\n")
+        # ⚡ 只在打包参数变化（本脚本更新）时重新生成spec
+        if not SPEC_FILE.exists() or SPEC_FILE.stat().st_mtime < Path(__file__).stat().st_mtime:
+            print(f"  📝 生成 {SPEC_FILE} ...")
+            subprocess.run(spec_cmd, check=True, stdout=subprocess.DEVNULL)
+        
+        # ⚡ 基于spec构建，未加--clean时复用 build/ 下缓存的Analysis结果
+        cmd = ['pyinstaller', '--noconfirm']
+        if clean:
+            cmd.append('--clean')
+        cmd.append(str(SPEC_FILE))
+        
+        print(f"  ⏳ 打包中{'（完整重新分析）' if clean else '（增量）'}...\n")
         result = subprocess.run(cmd, check=True)
+        _save_deps_stamp()
         
         elapsed = time.time() - start_time
         print(f"\n  ✓ 打包成功！")
@@ -143,6 +192,152 @@ def build_executable():
         return False
 
 
+def _copy_file(src, dst):
+    """使用1MB缓冲区复制单个文件（保留修改时间等元数据）"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        shutil.copyfileobj(fsrc, fdst, length=COPY_BUFSIZE)
+    shutil.copystat(src, dst)
+
+
+def _walk_files(src, dst):
+    """遍历源目录，创建目标目录结构，返回需要复制的(源, 目标)文件列表"""
+    pairs = []
+    os.makedirs(dst, exist_ok=True)
+    with os.scandir(src) as it:
+        for entry in it:
+            target = os.path.join(dst, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                pairs.extend(_walk_files(entry.path, target))
+            else:
+                pairs.append((entry.path, target))
+    return pairs
+
+
+def _iter_files(path):
+    """基于os.scandir递归产出目录下所有文件路径（字符串）"""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            else:
+                yield entry.path
+
+
+def _load_clonefile():
+    """加载macOS的clonefile(2)系统调用（APFS写时复制），不可用时返回None"""
+    if sys.platform != 'darwin':
+        return None
+    try:
+        from ctypes import CDLL, c_char_p, c_int, get_errno
+        from ctypes.util import find_library
+        libsystem = CDLL(find_library('System'), use_errno=True)
+        clonefile = libsystem.clonefile
+        clonefile.argtypes = [c_char_p, c_char_p, c_int]
+        clonefile.restype = c_int
+    except (OSError, AttributeError, TypeError):
+        return None
+    
+    def _clone(src, dst):
+        if clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            raise OSError(get_errno(), "clonefile failed", src)
+    
+    return _clone
+
+
+def fast_copytree(src, dst):
+    """
+    快速复制目录树
+    
+    Windows使用robocopy多线程复制；macOS在APFS上使用clonefile写时复制；
+    其他平台使用线程池并行复制文件，大量小文件时比shutil.copytree快数倍
+    """
+    src, dst = str(src), str(dst)
+    
+    clone = _load_clonefile()
+    if clone:
+        for file_src, file_dst in _walk_files(src, dst):
+            try:
+                clone(file_src, file_dst)
+            except OSError:
+                # 非APFS卷（ENOTSUP）或跨卷（EXDEV）时回退到普通复制
+                _copy_file(file_src, file_dst)
+        return
+    
+    if sys.platform == 'win32':
+        result = subprocess.run(
+            ['robocopy', src, dst, '/E', '/NFL', '/NDL', '/NJH', '/NJS', '/MT:16'],
+            stdout=subprocess.DEVNULL
+        )
+        # robocopy 返回码 0-7 表示成功（8及以上为失败）
+        if result.returncode <= 7:
+            return
+        print(f"  ⚠️ robocopy 失败 (返回码 {result.returncode})，回退到线程池复制")
+    
+    pairs = _walk_files(src, dst)
+    with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 2)) as executor:
+        # list() 触发执行并传播异常
+        list(executor.map(lambda p: _copy_file(*p), pairs))
+
+
+def create_portable_package():
+    """生成便携版压缩包（将onedir输出目录整体打包为ZIP）"""
+    print("\n📦 生成便携版压缩包...")
+    
+    dist_dir = Path('dist/SmartCutElf')
+    if not dist_dir.exists():
+        print("  ❌ 未找到打包输出目录 dist/SmartCutElf")
+        return None
+    
+    release_dir = Path('release')
+    portable_dir = release_dir / 'SmartCutElf'
+    if portable_dir.exists():
+        shutil.rmtree(portable_dir)
+    release_dir.mkdir(parents=True, exist_ok=True)
+    
+    # 复制onedir整个目录（exe + _internal依赖）
+    fast_copytree(dist_dir, portable_dir)
+    
+    # 附带使用文档
+    docs = [Path(doc) for doc in ['README.md', 'docs/使用说明.md', 'docs/FFmpeg安装指南.md']
+            if Path(doc).exists()]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda doc: _copy_file(doc, portable_dir / doc.name), docs))
+    
+    zip_name = release_dir / f"SmartCutElf_portable_{time.strftime('%Y%m%d')}.zip"
+    
+    # 优先使用7-Zip（LZMA2多线程，压缩率最高）
+    seven_zip = shutil.which('7z')
+    if seven_zip:
+        archive = zip_name.with_suffix('.7z')
+        if archive.exists():
+            archive.unlink()
+        result = subprocess.run(
+            [seven_zip, 'a', '-m0=lzma2', '-mx9', '-mmt16', str(archive), str(portable_dir)],
+            stdout=subprocess.DEVNULL
+        )
+        if result.returncode == 0:
+            size_mb = archive.stat().st_size / (1024*1024)
+            print(f"  ✓ 便携版: {archive} ({size_mb:.1f} MB)")
+            return archive
+        print(f"  ⚠️ 7-Zip 压缩失败 (返回码 {result.returncode})，回退到ZIP")
+    
+    # LZMA比DEFLATE体积小得多（注意：Windows资源管理器无法直接解压，需使用7-Zip/WinRAR）
+    with zipfile.ZipFile(zip_name, 'w', zipfile.ZIP_LZMA) as zipf:
+        # 归档内路径直接对字符串切片得到，避免逐文件构造Path对象
+        base_len = len(str(portable_dir.parent)) + 1
+        for file_path in _iter_files(str(portable_dir)):
+            zinfo = zipfile.ZipInfo.from_file(file_path, file_path[base_len:])
+            zinfo.compress_type = zipfile.ZIP_LZMA
+            # 以1MB块流式写入，减少read/write系统调用次数
+            with open(file_path, 'rb', buffering=0) as fsrc, \
+                    zipf.open(zinfo, 'w', force_zip64=True) as fdst:
+                shutil.copyfileobj(fsrc, fdst, length=COPY_BUFSIZE)
+    
+    size_mb = zip_name.stat().st_size / (1024*1024)
+    print(f"  ✓ 便携版: {zip_name} ({size_mb:.1f} MB)")
+    return zip_name
+
+
 def show_tips():
     """显示优化提示"""
     print("\n" + "="*70)
@@ -163,9 +358,9 @@ def show_tips():
    - UPX压缩会大幅增加打包时间
    - 如果不需要极致压缩，可以禁用
 
-4. ⚡ 增量打包
-   - 不要每次都用--clean
-   - 只在依赖变化时清理
+4. ⚡ 增量打包（--skip-clean）
+   - 复用 SmartCutElf.spec 和 build/ 中缓存的分析结果
+   - requirements.txt 变化时自动使用--clean完整重建
 
 5. ⚡ 使用SSD硬盘
    - 打包涉及大量文件读写
@@ -186,6 +381,13 @@ def show_tips():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='SmartCutElf 打包脚本')
+    parser.add_argument('--portable', action='store_true',
+                        help='打包完成后生成便携版ZIP（用于分发）')
+    parser.add_argument('--skip-clean', action='store_true',
+                        help='增量打包：保留build缓存，仅在依赖变化时清理')
+    args, _ = parser.parse_known_args()
+    
     print("╔══════════════════════════════════════════════════════════════╗")
     print("║          SmartCutElf 打包脚本                                ║")
     print("╚══════════════════════════════════════════════════════════════╝")
@@ -199,11 +401,17 @@ def main():
         print("请运行: pip install pyinstaller")
         return
     
-    # 清理旧文件
-    clean_build_dirs()
+    # 清理旧文件（增量模式下仅在依赖变化时清理）
+    if args.skip_clean:
+        clean = dependencies_changed()
+        if clean:
+            print("\n📌 检测到依赖变化，执行完整重建")
+    else:
+        clean = True
+        clean_build_dirs()
     
     # 打包
-    success = build_executable()
+    success = build_executable(clean=clean)
     
     if success:
         print("\n" + "="*70)
@@ -212,6 +420,9 @@ def main():
         print(f"\n📂 输出位置: {os.path.abspath('dist/SmartCutElf')}")
         print(f"🚀 运行程序: dist\\SmartCutElf\\SmartCutElf.exe")
         
+        if args.portable:
+            create_portable_package()
+        
         # 显示优化提示
         show_tips()
     else:
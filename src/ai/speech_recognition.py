@@ -3,7 +3,12 @@
 使用OpenAI Whisper进行语音转文字
 """
 
-from typing import List, Dict, Optional
+import copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Iterator, Optional
 from pathlib import Path
 from utils.logger import LoggerMixin
 
@@ -11,6 +16,15 @@ from utils.logger import LoggerMixin
 class SpeechRecognizer(LoggerMixin):
     """语音识别器"""
     
+    # 按模型大小缓存已加载的模型，多个实例共享同一份权重
+    _model_cache: Dict[str, object] = {}
+    _model_cache_lock = threading.Lock()
+    
+    # 转录结果缓存（所有实例共享）：(绝对路径, 语言, 修改时间, 大小, 模型大小, 后端) -> 结果
+    _TRANSCRIBE_CACHE_SIZE = 8
+    _transcribe_cache = OrderedDict()
+    _transcribe_cache_lock = threading.Lock()
+    
     def __init__(self, model_size: str = "base"):
         """
         初始化语音识别器
@@ -22,25 +36,94 @@ class SpeechRecognizer(LoggerMixin):
         self.model_size = model_size
         self.model = None
         self.whisper = None  # 延迟导入
+        self.backend = None  # whisper-cuda / faster-whisper / whisper-cpu
     
-    def _load_model(self):
-        """加载Whisper模型"""
-        # 延迟导入whisper
+    def _import_whisper(self):
+        """延迟导入whisper，未安装时返回None"""
         if self.whisper is None:
             try:
                 import whisper
                 self.whisper = whisper
             except ImportError:
-                self.logger.error("Whisper未安装，请运行: pip install openai-whisper")
-                raise ImportError("需要安装openai-whisper: pip install openai-whisper")
+                return None
+        return self.whisper
+    
+    @staticmethod
+    def _cuda_available() -> bool:
+        """检测是否可用CUDA"""
+        try:
+            import torch
+            return torch.cuda.is_available()
+        except ImportError:
+            return False
+    
+    def _create_model(self):
+        """
+        按运行环境选择推理后端：
+        CUDA可用时使用Whisper fp16，CPU上优先使用faster-whisper int8量化，
+        否则回退到Whisper fp32
+        
+        Returns:
+            (backend, model)
+        """
+        whisper = self._import_whisper()
+        
+        if whisper is not None and self._cuda_available():
+            self.logger.info(f"正在加载Whisper模型: {self.model_size} (CUDA fp16)")
+            return 'whisper-cuda', whisper.load_model(self.model_size, device='cuda')
+        
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            WhisperModel = None
+        
+        if WhisperModel is not None:
+            self.logger.info(f"正在加载Whisper模型: {self.model_size} (CPU int8)")
+            return 'faster-whisper', WhisperModel(self.model_size, device='cpu', compute_type='int8')
+        
+        if whisper is None:
+            self.logger.error("Whisper未安装，请运行: pip install openai-whisper")
+            raise ImportError("需要安装openai-whisper: pip install openai-whisper")
+        
+        self.logger.info(f"正在加载Whisper模型: {self.model_size} (CPU fp32)")
+        return 'whisper-cpu', whisper.load_model(self.model_size, device='cpu')
+    
+    def _load_model(self):
+        """加载Whisper模型"""
+        log = self.logger
+        with SpeechRecognizer._model_cache_lock:
+            cached = SpeechRecognizer._model_cache.get(self.model_size)
+            if cached is not None:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(f"复用已加载的Whisper模型: {self.model_size}")
+                self.backend, self.model = cached
+                return
+            
+            try:
+                self.backend, self.model = self._create_model()
+                SpeechRecognizer._model_cache[self.model_size] = (self.backend, self.model)
+                log.info("模型加载成功")
+            except ImportError:
+                raise
+            except Exception as e:
+                log.error(f"模型加载失败: {e}")
+                raise
+
+    def preload(self) -> bool:
+        """
+        预加载模型到类级缓存，供后台线程在启动时调用
         
+        Returns:
+            是否加载成功
+        """
+        if self.model:
+            return True
         try:
-            self.logger.info(f"正在加载Whisper模型: {self.model_size}")
-            self.model = self.whisper.load_model(self.model_size)
-            self.logger.info("模型加载成功")
+            self._load_model()
+            return True
         except Exception as e:
-            self.logger.error(f"模型加载失败: {e}")
-            raise
+            self.logger.warning(f"预加载Whisper模型失败: {e}")
+            return False
 
     def transcribe(self, audio_path: str, language: str = "zh") -> Optional[Dict]:
         """
@@ -53,6 +136,7 @@ class SpeechRecognizer(LoggerMixin):
         Returns:
             转录结果字典
         """
+        log = self.logger
         if not self.model:
             try:
                 self._load_model()
@@ -60,32 +144,107 @@ class SpeechRecognizer(LoggerMixin):
                 return None
         
         try:
-            self.logger.info(f"开始转录音频: {audio_path}")
-            
             # 检查文件是否存在
             if not Path(audio_path).exists():
-                self.logger.error(f"音频文件不存在: {audio_path}")
+                log.error(f"音频文件不存在: {audio_path}")
                 return None
             
-            # 执行转录
+            # 以修改时间和大小作为缓存键的一部分，文件变化后自动失效
+            stat = os.stat(audio_path)
+            cache_key = (os.path.abspath(audio_path), language, stat.st_mtime_ns, stat.st_size,
+                         self.model_size, self.backend)
+            with SpeechRecognizer._transcribe_cache_lock:
+                cached = SpeechRecognizer._transcribe_cache.get(cache_key)
+                if cached is not None:
+                    SpeechRecognizer._transcribe_cache.move_to_end(cache_key)
+            if cached is None:
+                cached = self._transcribe_uncached(audio_path, language)
+                with SpeechRecognizer._transcribe_cache_lock:
+                    SpeechRecognizer._transcribe_cache[cache_key] = cached
+                    while len(SpeechRecognizer._transcribe_cache) > self._TRANSCRIBE_CACHE_SIZE:
+                        SpeechRecognizer._transcribe_cache.popitem(last=False)
+            # 返回副本，调用方修改结果不会影响缓存
+            return copy.deepcopy(cached)
+            
+        except Exception as e:
+            log.error(f"转录失败: {e}")
+            return None
+    
+    def _transcribe_uncached(self, audio_path: str, language: str) -> Dict:
+        """
+        执行转录（结果由transcribe缓存，同一音频重复分析时不再重新推理）
+        
+        失败时抛出异常，避免失败结果被缓存
+        
+        Args:
+            audio_path: 音频文件路径
+            language: 语言代码
+            
+        Returns:
+            转录结果字典
+        """
+        log = self.logger
+        log.info(f"开始转录音频: {audio_path}")
+        
+        # 执行转录
+        if self.backend == 'faster-whisper':
+            result = self._transcribe_faster_whisper(audio_path, language)
+        else:
             result = self.model.transcribe(
                 audio_path,
                 language=language,
                 task="transcribe",
-                verbose=False
+                verbose=False,
+                fp16=self.backend == 'whisper-cuda'
             )
+        
+        segment_count = len(result.get('segments', []))
+        log.info(f"转录完成，识别到 {segment_count} 个片段")
+        
+        if segment_count == 0:
+            log.warning("Whisper返回了0个片段")
             
-            segment_count = len(result.get('segments', []))
-            self.logger.info(f"转录完成，识别到 {segment_count} 个片段")
-            
-            if segment_count == 0:
-                self.logger.warning("Whisper返回了0个片段")
-                
-            return result
+        return result
+    
+    def _transcribe_faster_whisper(self, audio_path: str, language: str) -> Dict:
+        """
+        使用faster-whisper转录，并转换为与Whisper一致的结果格式
+        
+        Args:
+            audio_path: 音频文件路径
+            language: 语言代码
             
-        except Exception as e:
-            self.logger.error(f"转录失败: {e}")
-            return None
+        Returns:
+            转录结果字典（text, segments, language）
+        """
+        segments, info = self.model.transcribe(audio_path, language=language, task="transcribe")
+        
+        result_segments = [
+            {
+                'start': seg.start,
+                'end': seg.end,
+                'text': seg.text,
+                'no_speech_prob': seg.no_speech_prob
+            }
+            for seg in segments
+        ]
+        
+        return {
+            'text': ''.join(seg['text'] for seg in result_segments),
+            'segments': result_segments,
+            'language': info.language
+        }
+    
+    @staticmethod
+    def _segments_from_result(result: Dict) -> Iterator[Dict]:
+        """将转录结果中的片段转换为对外的片段格式"""
+        for segment in result['segments']:
+            yield {
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': segment['text'].strip(),
+                'confidence': segment.get('no_speech_prob', 0)
+            }
     
     def get_segments(self, audio_path: str, language: str = "zh") -> List[Dict]:
         """
@@ -103,16 +262,7 @@ class SpeechRecognizer(LoggerMixin):
         if not result or 'segments' not in result:
             return []
         
-        segments = []
-        for segment in result['segments']:
-            segments.append({
-                'start': segment['start'],
-                'end': segment['end'],
-                'text': segment['text'].strip(),
-                'confidence': segment.get('no_speech_prob', 0)
-            })
-        
-        return segments
+        return list(self._segments_from_result(result))
     
     def get_full_text(self, audio_path: str, language: str = "zh") -> str:
         """
@@ -3,10 +3,46 @@
 生成SRT格式字幕文件
 """
 
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Tuple
 from pathlib import Path
-from datetime import timedelta
 from utils.logger import LoggerMixin
+from utils.jit import njit
+
+
+# 字幕文件写入缓冲区大小（1MB）
+SUBTITLE_WRITE_BUFSIZE = 1024 * 1024
+
+
+@njit(cache=True)
+def _merge_boundaries(starts, ends, char_lens, min_duration, max_chars):
+    """
+    计算短字幕合并组的结束位置（不含最后一组）
+    
+    Args:
+        starts: 开始时间数组
+        ends: 结束时间数组
+        char_lens: 文本长度数组
+        min_duration: 最小时长（秒）
+        max_chars: 单条字幕最大字符数
+        
+    Returns:
+        合并组结束索引数组
+    """
+    n = starts.shape[0]
+    out = np.empty(n, np.int64)
+    k = 0
+    group_start = 0
+    group_chars = char_lens[0]
+    for i in range(1, n):
+        if ends[i - 1] - starts[group_start] < min_duration and group_chars + 1 + char_lens[i] <= max_chars:
+            group_chars += 1 + char_lens[i]
+        else:
+            out[k] = i
+            k += 1
+            group_start = i
+            group_chars = char_lens[i]
+    return out[:k]
 
 
 class SubtitleGenerator(LoggerMixin):
@@ -16,23 +52,24 @@ class SubtitleGenerator(LoggerMixin):
         """初始化字幕生成器"""
         super().__init__()
     
-    def _format_time(self, seconds: float) -> str:
+    def _format_time(self, seconds: float, sep: str = ',') -> str:
         """
         将秒数转换为SRT时间格式
         
         Args:
             seconds: 秒数
+            sep: 秒与毫秒之间的分隔符（SRT为','，VTT为'.'）
             
         Returns:
             SRT时间格式字符串 (HH:MM:SS,mmm)
         """
-        td = timedelta(seconds=seconds)
-        hours = int(td.total_seconds() // 3600)
-        minutes = int((td.total_seconds() % 3600) // 60)
-        secs = int(td.total_seconds() % 60)
-        millis = int((td.total_seconds() % 1) * 1000)
+        # 纯整数运算，避免构造timedelta和重复的浮点取模
+        ms_total = int(seconds * 1000)
+        hours, rem = divmod(ms_total, 3_600_000)
+        minutes, rem = divmod(rem, 60_000)
+        secs, millis = divmod(rem, 1000)
         
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}{sep}{millis:03d}"
     
     def generate_srt(self, segments: List[Dict], output_path: str) -> bool:
         """
@@ -45,26 +82,26 @@ class SubtitleGenerator(LoggerMixin):
         Returns:
             是否成功
         """
+        log = self.logger
         try:
-            self.logger.info(f"生成SRT字幕文件: {output_path}")
+            log.info(f"生成SRT字幕文件: {output_path}")
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(segments, 1):
-                    start_time = self._format_time(segment['start'])
-                    end_time = self._format_time(segment['end'])
-                    text = segment['text']
-                    
-                    # SRT格式：序号、时间范围、文本、空行
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{text}\n")
-                    f.write("\n")
+            # SRT格式：序号、时间范围、文本、空行
+            format_time = self._format_time
+            parts = [
+                f"{i}\n{format_time(segment['start'])} --> {format_time(segment['end'])}\n{segment['text']}\n\n"
+                for i, segment in enumerate(segments, 1)
+            ]
             
-            self.logger.info(f"字幕文件生成成功，共 {len(segments)} 条字幕")
+            # 一次性写入，避免逐行write经过编码层
+            with open(output_path, 'w', encoding='utf-8', newline='\n', buffering=SUBTITLE_WRITE_BUFSIZE) as f:
+                f.write("".join(parts))
+            
+            log.info(f"字幕文件生成成功，共 {len(segments)} 条字幕")
             return True
             
         except Exception as e:
-            self.logger.error(f"字幕生成失败: {e}")
+            log.error(f"字幕生成失败: {e}")
             return False
     
     def generate_vtt(self, segments: List[Dict], output_path: str) -> bool:
@@ -78,29 +115,44 @@ class SubtitleGenerator(LoggerMixin):
         Returns:
             是否成功
         """
+        log = self.logger
         try:
-            self.logger.info(f"生成VTT字幕文件: {output_path}")
+            log.info(f"生成VTT字幕文件: {output_path}")
+            
+            format_time = self._format_time
+            parts = ["WEBVTT\n\n"]
+            parts.extend(
+                f"{i}\n{format_time(segment['start'], sep='.')} --> {format_time(segment['end'], sep='.')}\n{segment['text']}\n\n"
+                for i, segment in enumerate(segments, 1)
+            )
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("WEBVTT\n\n")
-                
-                for i, segment in enumerate(segments, 1):
-                    start_time = self._format_time(segment['start']).replace(',', '.')
-                    end_time = self._format_time(segment['end']).replace(',', '.')
-                    text = segment['text']
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{text}\n")
-                    f.write("\n")
+            with open(output_path, 'w', encoding='utf-8', newline='\n', buffering=SUBTITLE_WRITE_BUFSIZE) as f:
+                f.write("".join(parts))
             
-            self.logger.info("VTT字幕文件生成成功")
+            log.info("VTT字幕文件生成成功")
             return True
             
         except Exception as e:
-            self.logger.error(f"VTT字幕生成失败: {e}")
+            log.error(f"VTT字幕生成失败: {e}")
             return False
     
+    @staticmethod
+    def _to_soa(segments: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        将字幕片段列表转换为并列数组（SoA）
+        
+        Args:
+            segments: 字幕片段列表
+            
+        Returns:
+            (starts, ends, texts)
+        """
+        n = len(segments)
+        starts = np.fromiter((seg['start'] for seg in segments), dtype=np.float64, count=n)
+        ends = np.fromiter((seg['end'] for seg in segments), dtype=np.float64, count=n)
+        texts = [seg['text'] for seg in segments]
+        return starts, ends, texts
+    
     def adjust_timing(self, segments: List[Dict], offset: float) -> List[Dict]:
         """
         调整字幕时间偏移
@@ -112,16 +164,17 @@ class SubtitleGenerator(LoggerMixin):
         Returns:
             调整后的片段列表
         """
-        adjusted = []
+        if not segments:
+            return []
         
-        for segment in segments:
-            adjusted.append({
-                'start': max(0, segment['start'] + offset),
-                'end': max(0, segment['end'] + offset),
-                'text': segment['text']
-            })
+        starts, ends, texts = self._to_soa(segments)
+        starts = np.maximum(0, starts + offset).tolist()
+        ends = np.maximum(0, ends + offset).tolist()
         
-        return adjusted
+        return [
+            {'start': start, 'end': end, 'text': text}
+            for start, end, text in zip(starts, ends, texts)
+        ]
     
     def merge_short_segments(self, segments: List[Dict], 
                            min_duration: float = 1.0,
@@ -137,26 +190,34 @@ class SubtitleGenerator(LoggerMixin):
         Returns:
             合并后的片段列表
         """
+        log = self.logger
         if not segments:
             return []
         
-        merged = []
-        current = segments[0].copy()
+        starts, ends, texts = self._to_soa(segments)
         
-        for next_seg in segments[1:]:
-            current_duration = current['end'] - current['start']
-            combined_text = current['text'] + ' ' + next_seg['text']
-            
-            # 如果当前片段太短，且合并后不超过字符限制，则合并
-            if current_duration < min_duration and len(combined_text) <= max_chars:
-                current['end'] = next_seg['end']
-                current['text'] = combined_text
-            else:
-                merged.append(current)
-                current = next_seg.copy()
+        # 合并组只能从过短的片段开始，没有过短片段时无需合并
+        if not ((ends - starts) < min_duration).any():
+            merged = [seg.copy() for seg in segments]
+            log.info(f"字幕合并完成：{len(segments)} -> {len(merged)} 条")
+            return merged
         
-        # 添加最后一个片段
-        merged.append(current)
+        # 数值内核确定合并组边界，Python只负责拼接文本
+        char_lens = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        boundaries = _merge_boundaries(starts, ends, char_lens,
+                                       float(min_duration), int(max_chars)).tolist()
+        boundaries.append(len(segments))
+        
+        # 仅在返回时构建字典，保持原有接口
+        merged = []
+        group_start = 0
+        for group_end in boundaries:
+            current = segments[group_start].copy()
+            if group_end - group_start > 1:
+                current['end'] = segments[group_end - 1]['end']
+                current['text'] = ' '.join(texts[group_start:group_end])
+            merged.append(current)
+            group_start = group_end
         
-        self.logger.info(f"字幕合并完成：{len(segments)} -> {len(merged)} 条")
+        log.info(f"字幕合并完成：{len(segments)} -> {len(merged)} 条")
         return merged
@@ -4,6 +4,12 @@
 """
 
 import os
+import shutil
+import hashlib
+import threading
+import tempfile
+import wave
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional, List
 from utils.logger import setup_logger
@@ -14,25 +20,99 @@ except ImportError:
     pyttsx3 = None
 
 
+# 默认语音缓存目录（放在系统临时目录，避免依赖安装目录或当前工作目录是否可写）
+DEFAULT_TTS_CACHE_DIR = Path(tempfile.gettempdir()) / 'SmartCutElf' / 'tts_cache'
+# 语音缓存默认上限（MB），超出时按最近使用时间淘汰
+DEFAULT_TTS_CACHE_MAX_MB = 200
+# 本进程已清理过的缓存目录
+_PRUNED_CACHE_DIRS = set()
+
+# 进程内共享的引擎与语音列表（枚举系统语音较慢，只做一次）
+_ENGINE_SINGLETON = None
+_VOICES_CACHE: Optional[list] = None
+# pyttsx3引擎不可重入，所有引擎调用都需持有此锁
+_ENGINE_LOCK = threading.RLock()
+
+
+def _get_engine():
+    """获取进程内共享的pyttsx3引擎（首次调用时创建）"""
+    global _ENGINE_SINGLETON
+    with _ENGINE_LOCK:
+        if _ENGINE_SINGLETON is None:
+            _ENGINE_SINGLETON = pyttsx3.init()
+        return _ENGINE_SINGLETON
+
+
+def _get_voices(engine) -> list:
+    """获取系统语音列表（缓存）"""
+    global _VOICES_CACHE
+    with _ENGINE_LOCK:
+        if _VOICES_CACHE is None:
+            _VOICES_CACHE = list(engine.getProperty('voices') or [])
+        return _VOICES_CACHE
+
+
+# 工作进程内的TTS实例（pyttsx3.init()在同一进程内返回同一个引擎，
+# 因此并行合成必须使用多进程，每个进程各自持有一个引擎）
+_worker_tts = None
+
+
+def _init_tts_worker(config: dict):
+    """工作进程初始化：创建本进程的TTS引擎"""
+    global _worker_tts
+    _worker_tts = TextToSpeech(config)
+
+
+def _synthesize_batch_in_worker(items: List[tuple]) -> List[bool]:
+    """
+    在工作进程中批量合成一组片段：全部排入引擎队列后只调用一次runAndWait
+    
+    Args:
+        items: [(text, output_path), ...]
+    
+    Returns:
+        每个片段是否生成成功
+    """
+    engine = _worker_tts.engine
+    try:
+        with _ENGINE_LOCK:
+            _worker_tts._ensure_configured()
+            for text, output_path in items:
+                engine.save_to_file(text, output_path)
+            engine.runAndWait()
+    except Exception as e:
+        _worker_tts.logger.error(f"批量语音合成失败: {e}")
+    
+    return [os.path.exists(path) and os.path.getsize(path) > 0 for _, path in items]
+
+
 class TextToSpeech:
     """文本转语音类"""
     
-    def __init__(self, config: dict):
+    # 最近一次向共享引擎应用参数的实例
+    _configured_by = None
+    
+    def __init__(self, config: dict, cache_dir: Optional[str] = None, use_cache: bool = True):
         """
         初始化TTS引擎
         
         Args:
-            config: 配置字典，包含rate, volume, voice等参数
+            config: 配置字典，包含rate, volume, voice, cache_max_mb等参数
+            cache_dir: 语音缓存目录（按文本和音色参数缓存合成结果），None表示使用系统临时目录
+            use_cache: 是否启用语音缓存
         """
         self.logger = setup_logger()
         self.config = config
         self.engine = None
+        self.cache_dir = (Path(cache_dir) if cache_dir else DEFAULT_TTS_CACHE_DIR) if use_cache else None
         
         try:
             if pyttsx3 is None:
                 raise RuntimeError("未安装pyttsx3，请执行 pip install pyttsx3 后再启用配音")
-            self.engine = pyttsx3.init()
-            self._configure()
+            self.engine = _get_engine()
+            with _ENGINE_LOCK:
+                self._configure()
+                TextToSpeech._configured_by = self
             self.logger.info("TTS引擎初始化成功")
         except Exception as e:
             self.logger.error(f"TTS引擎初始化失败: {e}")
@@ -57,6 +137,12 @@ class TextToSpeech:
         
         self.logger.info(f"TTS配置: 语速={rate}, 音量={volume}, 音色={voice_gender}")
     
+    def _ensure_configured(self):
+        """共享引擎可能被其他实例改过参数，必要时重新应用本实例配置（需持有引擎锁）"""
+        if TextToSpeech._configured_by is not self:
+            self._configure()
+            TextToSpeech._configured_by = self
+    
     def _set_voice(self, gender: str = 'female'):
         """
         设置音色
@@ -67,7 +153,7 @@ class TextToSpeech:
         if not self.engine:
             return
         
-        voices = self.engine.getProperty('voices')
+        voices = _get_voices(self.engine)
         
         # Windows下使用SAPI5，通常第0个是男声，第1个是女声
         # 但这取决于系统安装的语音包
@@ -104,23 +190,148 @@ class TextToSpeech:
             output_dir = Path(output_path).parent
             output_dir.mkdir(parents=True, exist_ok=True)
             
+            # 命中缓存时直接链接已合成的音频，跳过合成
+            cache_path = self._prepare_cache_path(text, output_path)
+            if cache_path is not None and cache_path.exists() and cache_path.stat().st_size > 0:
+                try:
+                    self._link_or_copy(cache_path, output_path)
+                except OSError as e:
+                    self.logger.warning(f"读取语音缓存失败，重新合成: {e}")
+                else:
+                    # 更新修改时间，作为清理缓存时的最近使用时间
+                    try:
+                        os.utime(cache_path)
+                    except OSError:
+                        pass
+                    self.logger.info(f"语音缓存命中: {output_path}")
+                    return True
+            
             # 生成语音
             self.logger.info(f"开始生成语音: {len(text)} 字符 -> {output_path}")
-            self.engine.save_to_file(text, output_path)
-            self.engine.runAndWait()
             
-            # 验证文件是否生成
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            # 未命中时合成到缓存文件，再链接到输出路径；缓存不可用时直接写输出路径
+            if cache_path is not None:
+                if self._synthesize_to(text, str(cache_path)):
+                    try:
+                        self._link_or_copy(cache_path, output_path)
+                        self.logger.info(f"语音生成成功: {output_path}")
+                        return True
+                    except OSError as e:
+                        self.logger.warning(f"语音缓存链接失败，直接写入输出文件: {e}")
+                cache_path.unlink(missing_ok=True)
+            
+            if self._synthesize_to(text, output_path):
                 self.logger.info(f"语音生成成功: {output_path}")
                 return True
-            else:
-                self.logger.error("语音文件生成失败或为空")
-                return False
+            
+            self.logger.error("语音文件生成失败或为空")
+            return False
                 
         except Exception as e:
             self.logger.error(f"语音合成失败: {e}")
             return False
     
+    def _synthesize_to(self, text: str, path: str) -> bool:
+        """
+        合成语音到指定文件
+        
+        Args:
+            text: 要转换的文本
+            path: 目标文件路径
+        
+        Returns:
+            文件是否生成且非空
+        """
+        try:
+            with _ENGINE_LOCK:
+                self._ensure_configured()
+                self.engine.save_to_file(text, path)
+                self.engine.runAndWait()
+        except Exception as e:
+            self.logger.warning(f"语音合成失败: {path}: {e}")
+            return False
+        return os.path.exists(path) and os.path.getsize(path) > 0
+    
+    def _prepare_cache_path(self, text: str, output_path: str) -> Optional[Path]:
+        """
+        获取缓存文件路径并确保目录存在（首次使用时按上限清理旧缓存）
+        
+        Args:
+            text: 要转换的文本
+            output_path: 输出音频文件路径
+        
+        Returns:
+            缓存文件路径；未启用缓存或缓存目录不可用时返回None
+        """
+        cache_path = self._get_cache_path(text, output_path)
+        if cache_path is None:
+            return None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.cache_dir not in _PRUNED_CACHE_DIRS:
+                _PRUNED_CACHE_DIRS.add(self.cache_dir)
+                self._prune_cache()
+        except OSError as e:
+            self.logger.warning(f"语音缓存目录不可用，直接写入输出文件: {e}")
+            return None
+        return cache_path
+    
+    def _prune_cache(self):
+        """缓存总大小超过上限时，按最近使用时间从旧到新删除"""
+        max_bytes = self.config.get('cache_max_mb', DEFAULT_TTS_CACHE_MAX_MB) * 1024 * 1024
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= max_bytes:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            if total <= max_bytes:
+                break
+        self.logger.info(f"语音缓存已清理至 {total / 1024 / 1024:.1f}MB")
+    
+    def _get_cache_path(self, text: str, output_path: str) -> Optional[Path]:
+        """
+        计算文本对应的缓存文件路径（内容寻址）
+        
+        Args:
+            text: 要转换的文本
+            output_path: 输出音频文件路径（用于确定文件格式）
+        
+        Returns:
+            缓存文件路径，未启用缓存时返回None
+        """
+        if self.cache_dir is None:
+            return None
+        
+        voice = self.config.get('voice', 'female')
+        rate = self.config.get('rate', 150)
+        volume = self.config.get('volume', 0.9)
+        key = hashlib.sha1(f"{text}|{voice}|{rate}|{volume}".encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}{Path(output_path).suffix}"
+    
+    @staticmethod
+    def _link_or_copy(src: Path, dst: str):
+        """优先硬链接（无数据复制），跨磁盘等不支持时复制"""
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+    
     def synthesize_from_subtitles(self, subtitle_segments: List[dict], output_path: str) -> bool:
         """
         从字幕片段生成完整配音
@@ -157,27 +368,184 @@ class TextToSpeech:
         output_dir_path = Path(output_dir)
         output_dir_path.mkdir(parents=True, exist_ok=True)
         
-        for i, segment in enumerate(subtitle_segments):
-            text = segment.get('text', '').strip()
-            if not text:
-                continue
-            
-            # 生成独立的音频文件
-            audio_filename = f"tts_segment_{i:04d}.wav"
-            audio_path = output_dir_path / audio_filename
+        if not self.engine:
+            self.logger.error("TTS引擎未初始化")
+            return audio_segments
+        
+        # 第一遍：所有片段排入引擎队列
+        queued = []
+        _ENGINE_LOCK.acquire()
+        try:
+            self._ensure_configured()
+            for i, segment in enumerate(subtitle_segments):
+                prepared = self._prepare_timed_segment(i, segment, output_dir_path)
+                if prepared is None:
+                    continue
+                text, audio_path = prepared
+                self.engine.save_to_file(text, audio_path)
+                queued.append((i, segment, text, audio_path))
             
-            if self.synthesize(text, str(audio_path)):
+            # 第二遍：只调用一次runAndWait，引擎初始化开销只付一次
+            self.logger.info(f"开始批量生成语音: {len(queued)} 个片段")
+            self.engine.runAndWait()
+        except Exception as e:
+            self.logger.error(f"批量语音合成失败: {e}")
+        finally:
+            _ENGINE_LOCK.release()
+        
+        # 第三遍：校验文件并组装结果
+        for i, segment, text, audio_path in queued:
+            if os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
                 audio_segments.append({
-                    'audio_path': str(audio_path),
+                    'audio_path': audio_path,
                     'start': segment.get('start', 0),
                     'end': segment.get('end', 0),
                     'text': text
                 })
                 self.logger.debug(f"片段 {i} 配音完成: {text[:20]}...")
+            else:
+                self.logger.warning(f"片段 {i} 语音文件生成失败或为空")
         
         self.logger.info(f"完成 {len(audio_segments)}/{len(subtitle_segments)} 个片段的配音")
         return audio_segments
     
+    def synthesize_segments(self, subtitle_segments: List[dict], output_dir: str,
+                            workers: Optional[int] = None) -> List[dict]:
+        """
+        使用多个TTS引擎并行为每个字幕片段生成独立的音频文件
+        
+        Args:
+            subtitle_segments: 字幕片段列表
+            output_dir: 输出目录
+            workers: 并行进程数（默认读取配置workers，缺省为CPU核数且不超过4）
+        
+        Returns:
+            List[dict]: 包含音频路径和时间信息的列表，顺序与输入一致
+        """
+        if workers is None:
+            workers = self.config.get('workers', min(4, os.cpu_count() or 1))
+        
+        output_dir_path = Path(output_dir)
+        output_dir_path.mkdir(parents=True, exist_ok=True)
+        
+        jobs = []
+        for i, segment in enumerate(subtitle_segments):
+            prepared = self._prepare_timed_segment(i, segment, output_dir_path)
+            if prepared is not None:
+                jobs.append((i, segment) + prepared)
+        
+        if workers <= 1 or len(jobs) <= 1:
+            return self.synthesize_timed_audio(subtitle_segments, output_dir)
+        
+        # 按顺序切成连续的块，每个进程处理一块并只调用一次runAndWait
+        workers = min(workers, len(jobs))
+        chunk_size = -(-len(jobs) // workers)
+        chunks = [
+            [(job[2], job[3]) for job in jobs[k:k + chunk_size]]
+            for k in range(0, len(jobs), chunk_size)
+        ]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=len(chunks),
+                                     initializer=_init_tts_worker,
+                                     initargs=(self.config,)) as pool:
+                # map按输入顺序返回结果
+                results = [ok for chunk_result in pool.map(_synthesize_batch_in_worker, chunks)
+                           for ok in chunk_result]
+        except Exception as e:
+            self.logger.warning(f"并行语音合成失败，改为串行: {e}")
+            return self.synthesize_timed_audio(subtitle_segments, output_dir)
+        
+        audio_segments = []
+        for (i, segment, text, audio_path), ok in zip(jobs, results):
+            if ok:
+                audio_segments.append({
+                    'audio_path': audio_path,
+                    'start': segment.get('start', 0),
+                    'end': segment.get('end', 0),
+                    'text': text
+                })
+                self.logger.debug(f"片段 {i} 配音完成: {text[:20]}...")
+        
+        self.logger.info(f"完成 {len(audio_segments)}/{len(subtitle_segments)} 个片段的配音（{workers} 进程）")
+        return audio_segments
+    
+    def synthesize_concatenated(self, subtitle_segments: List[dict], output_path: str) -> bool:
+        """
+        为字幕片段逐段配音，并按字幕时间轴拼接为单个音频文件
+        
+        片段音频由多个进程并行合成到临时目录，在内存中按开始时间补齐静音后一次性写出。
+        
+        Args:
+            subtitle_segments: 字幕片段列表，每个片段包含 {'start': float, 'end': float, 'text': str}
+            output_path: 输出音频文件路径（WAV）
+        
+        Returns:
+            bool: 成功返回True，失败返回False
+        """
+        if not subtitle_segments:
+            self.logger.warning("字幕片段为空")
+            return False
+        
+        try:
+            with tempfile.TemporaryDirectory(prefix="tts_") as temp_dir:
+                audio_segments = self.synthesize_segments(subtitle_segments, temp_dir)
+                if not audio_segments:
+                    self.logger.error("没有成功生成的配音片段")
+                    return False
+                
+                params = None
+                timeline = bytearray()
+                for item in audio_segments:
+                    with wave.open(item['audio_path'], 'rb') as wav:
+                        if params is None:
+                            params = wav.getparams()
+                        frames = wav.readframes(wav.getnframes())
+                    
+                    # 在片段开始前补齐静音，与字幕时间轴对齐（前一段过长时紧接其后）
+                    frame_bytes = params.sampwidth * params.nchannels
+                    start_offset = int(item['start'] * params.framerate) * frame_bytes
+                    if start_offset > len(timeline):
+                        timeline.extend(bytes(start_offset - len(timeline)))
+                    timeline.extend(frames)
+            
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            with wave.open(output_path, 'wb') as out:
+                out.setnchannels(params.nchannels)
+                out.setsampwidth(params.sampwidth)
+                out.setframerate(params.framerate)
+                out.writeframes(timeline)
+            
+            self.logger.info(f"拼接配音完成: {len(audio_segments)} 个片段 -> {output_path}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"拼接配音失败: {e}")
+            return False
+    
+    @staticmethod
+    def _prepare_timed_segment(index: int, segment: dict, output_dir_path: Path) -> Optional[tuple]:
+        """
+        准备单个字幕片段的合成参数
+        
+        Args:
+            index: 片段序号
+            segment: 字幕片段
+            output_dir_path: 输出目录
+        
+        Returns:
+            (text, audio_path)，文本为空时返回None
+        """
+        text = segment.get('text', '').strip()
+        if not text:
+            return None
+        
+        # 生成独立的音频文件，清除上次遗留的同名文件以免误判成功
+        audio_path = str(output_dir_path / f"tts_segment_{index:04d}.wav")
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+        return text, audio_path
+    
     def get_available_voices(self) -> List[dict]:
         """
         获取系统可用的语音列表
@@ -188,7 +556,7 @@ class TextToSpeech:
         if not self.engine:
             return []
         
-        voices = self.engine.getProperty('voices')
+        voices = _get_voices(self.engine)
         voice_list = []
         
         for voice in voices:
@@ -3,12 +3,90 @@
 分析音频特征，检测音量变化、静音段等
 """
 
+import math
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.io import wavfile
 from scipy import signal
+from collections import namedtuple
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from utils.logger import LoggerMixin
+from utils.jit import njit
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+
+# dB换算系数：20*log10(x) == 20/log2(10) * log2(x)，log2的向量化实现更快
+_DB_PER_LOG2 = np.float32(20.0 / math.log2(10.0))
+
+# 能量分析结果（SoA）：time/energy/db均为等长的NumPy数组
+EnergyFrames = namedtuple('EnergyFrames', 'time energy db')
+
+
+def _aligned_empty(shape, dtype, alignment: int = 64) -> np.ndarray:
+    """
+    分配起始地址按alignment字节对齐的未初始化数组，便于SIMD对齐加载
+    
+    Args:
+        shape: 数组形状
+        dtype: 数据类型
+        alignment: 对齐字节数
+        
+    Returns:
+        对齐的数组（底层缓冲区的视图，C连续）
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -buf.ctypes.data % alignment
+    return buf[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def _window_sumsq_numpy(audio_data: np.ndarray, window_samples: int) -> np.ndarray:
+    """按完整窗口计算平方和（NumPy实现）"""
+    n_full = len(audio_data) // window_samples
+    frames = audio_data[:n_full * window_samples].reshape(n_full, window_samples)
+    # einsum直接求每行平方和，不生成x**2临时数组
+    return np.einsum('ij,ij->i', frames, frames, dtype=np.float32)
+
+
+# 窗口平方和分块累加的块长：块内float32累加可向量化，块间以float64累加控制舍入误差
+_SUMSQ_BLOCK = 256
+
+
+@njit(fallback=_window_sumsq_numpy, cache=True, fastmath=True, boundscheck=False)
+def _window_sumsq(audio_data, window_samples):
+    """
+    按完整窗口计算平方和（numba可用时JIT编译）
+    
+    Args:
+        audio_data: 连续的单声道音频数据
+        window_samples: 窗口采样数
+        
+    Returns:
+        每个完整窗口的平方和数组
+    """
+    n_full = audio_data.shape[0] // window_samples
+    out = np.empty(n_full, np.float32)
+    for w in range(n_full):
+        base = w * window_samples
+        end = base + window_samples
+        total = 0.0
+        # 整个窗口直接以float32累加时误差随窗口长度增长（如48kHz的1秒窗口）；
+        # 分块后每块只累加256个采样，SIMD通道数仍是float64的两倍
+        for block_start in range(base, end, _SUMSQ_BLOCK):
+            block_end = min(block_start + _SUMSQ_BLOCK, end)
+            s = np.float32(0.0)
+            for j in range(block_start, block_end):
+                v = audio_data[j]
+                s += v * v
+            total += s
+        out[w] = total
+    return out
 
 
 class AudioAnalyzer(LoggerMixin):
@@ -29,30 +107,21 @@ class AudioAnalyzer(LoggerMixin):
             (sample_rate, audio_data)
         """
         try:
-            sample_rate, audio_data = wavfile.read(audio_path)
-            
-            # 如果是立体声，转换为单声道
-            if len(audio_data.shape) == 2:
-                audio_data = np.mean(audio_data, axis=1)
-            
-            # 归一化到[-1, 1]
-            if audio_data.dtype == np.int16:
-                audio_data = audio_data.astype(np.float32) / 32768.0
-            elif audio_data.dtype == np.int32:
-                audio_data = audio_data.astype(np.float32) / 2147483648.0
-            elif audio_data.dtype == np.float32:
-                # 已经是float32，检查是否需要归一化
-                if np.max(np.abs(audio_data)) > 1.0:
-                    audio_data = audio_data / np.max(np.abs(audio_data))
-            elif audio_data.dtype == np.float64:
-                audio_data = audio_data.astype(np.float32)
-                if np.max(np.abs(audio_data)) > 1.0:
-                    audio_data = audio_data / np.max(np.abs(audio_data))
+            if sf is not None:
+                # 直接解码为float32，省去整型中间数组和整体除法；
+                # 结果写入64字节对齐的缓冲区，后续窗口计算可使用对齐的SIMD加载
+                with sf.SoundFile(audio_path) as f:
+                    sample_rate = f.samplerate
+                    if f.channels == 1:
+                        audio_data = f.read(dtype='float32', out=_aligned_empty(f.frames, np.float32))
+                    else:
+                        frames = f.read(dtype='float32', always_2d=True)
+                        audio_data = _aligned_empty(len(frames), np.float32)
+                        np.mean(frames, axis=1, dtype=np.float32, out=audio_data)
             else:
-                # 其他类型，尝试转换为float32并归一化
-                audio_data = audio_data.astype(np.float32)
-                if np.max(np.abs(audio_data)) > 1.0:
-                    audio_data = audio_data / np.max(np.abs(audio_data))
+                sample_rate, audio_data = wavfile.read(audio_path)
+            
+            audio_data = self._as_float_mono(audio_data)
             
             self.logger.debug(f"音频加载成功: {audio_path}, 采样率: {sample_rate}Hz")
             return sample_rate, audio_data
@@ -60,9 +129,184 @@ class AudioAnalyzer(LoggerMixin):
             self.logger.error(f"音频加载失败: {e}")
             raise
     
+    @staticmethod
+    def _as_float_mono(audio_data: np.ndarray) -> np.ndarray:
+        """
+        将原始采样转换为归一化到[-1, 1]的float32单声道数据
+        
+        Args:
+            audio_data: 原始采样数据（一维或[采样数, 声道数]）
+            
+        Returns:
+            float32单声道音频数据
+        """
+        # 如果是立体声，转换为单声道
+        if len(audio_data.shape) == 2:
+            audio_data = np.mean(audio_data, axis=1)
+        
+        # 归一化到[-1, 1]
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        elif audio_data.dtype == np.int32:
+            audio_data = audio_data.astype(np.float32) / 2147483648.0
+        elif audio_data.dtype == np.float32:
+            # 已经是float32，检查是否需要归一化
+            if np.max(np.abs(audio_data)) > 1.0:
+                audio_data = audio_data / np.max(np.abs(audio_data))
+        elif audio_data.dtype == np.float64:
+            audio_data = audio_data.astype(np.float32)
+            if np.max(np.abs(audio_data)) > 1.0:
+                audio_data = audio_data / np.max(np.abs(audio_data))
+        else:
+            # 其他类型，尝试转换为float32并归一化
+            audio_data = audio_data.astype(np.float32)
+            if np.max(np.abs(audio_data)) > 1.0:
+                audio_data = audio_data / np.max(np.abs(audio_data))
+        
+        return audio_data
+    
+    @staticmethod
+    def _windowed_stats(audio_data: np.ndarray, window_samples: int) -> Tuple[np.ndarray, float, int]:
+        """
+        单次遍历计算固定窗口的平方和统计
+        
+        Args:
+            audio_data: 单声道音频数据
+            window_samples: 窗口采样数
+            
+        Returns:
+            (完整窗口平方和数组, 末尾不完整窗口平方和, 末尾采样数)
+        """
+        audio_data = np.ascontiguousarray(audio_data)
+        n_full = len(audio_data) // window_samples
+        sumsq = _window_sumsq(audio_data, window_samples)
+        tail = audio_data[n_full * window_samples:]
+        return sumsq, float(np.dot(tail, tail)), len(tail)
+    
+    @staticmethod
+    def _stats_rms(stats: Tuple[np.ndarray, float, int], window_samples: int,
+                   factor: int = 1, min_tail: int = 1) -> np.ndarray:
+        """
+        由基础窗口统计合并出更大窗口的RMS（大窗口 = factor个基础窗口）
+        
+        Args:
+            stats: _windowed_stats的返回值
+            window_samples: 基础窗口采样数
+            factor: 合并的基础窗口数
+            min_tail: 末尾不足一个大窗口时，保留该窗口所需的最少采样数
+            
+        Returns:
+            每个大窗口的RMS数组
+        """
+        sumsq, tail_sumsq, tail_len = stats
+        n_full = len(sumsq) // factor
+        merged = sumsq[:n_full * factor].reshape(n_full, factor).sum(axis=1, dtype=np.float32)
+        rms = np.sqrt(merged / np.float32(window_samples * factor))
+        
+        # 剩余的基础窗口与不完整窗口合并为末尾窗口
+        rest = len(sumsq) - n_full * factor
+        rest_len = rest * window_samples + tail_len
+        if rest_len > 0 and rest_len >= min_tail:
+            rest_sumsq = float(sumsq[n_full * factor:].sum()) + tail_sumsq
+            rms = np.append(rms, np.float32(np.sqrt(rest_sumsq / rest_len)))
+        
+        return rms
+    
+    def _stream_windowed_stats(self, audio_path: str, window_size: float,
+                               block_seconds: float = 10.0) -> Optional[Tuple[int, int, Tuple[np.ndarray, float, int], int]]:
+        """
+        分块流式读取音频并计算固定窗口的平方和统计，内存占用与文件长度无关
+        
+        仅适用于整型PCM文件（解码结果已在[-1, 1]内，无需全局峰值归一化）；
+        未安装soundfile或格式不适用时返回None，由调用方回退到整体读取。
+        
+        Args:
+            audio_path: 音频文件路径
+            window_size: 窗口大小（秒）
+            block_seconds: 每次读取的时长（秒）
+            
+        Returns:
+            (sample_rate, window_samples, stats, total_frames)，stats与_windowed_stats一致
+        """
+        if sf is None:
+            return None
+        
+        try:
+            with sf.SoundFile(audio_path) as f:
+                if not f.subtype.startswith('PCM'):
+                    return None
+                
+                sample_rate = f.samplerate
+                window_samples = int(window_size * sample_rate)
+                if window_samples <= 0:
+                    return None
+                total_frames = f.frames
+                
+                # 块大小取窗口的整数倍，窗口不会跨块，无需保留块尾
+                blocksize = max(1, int(block_seconds * sample_rate) // window_samples) * window_samples
+                sumsq = np.empty(total_frames // window_samples, dtype=np.float32)
+                written = 0
+                tail_sumsq, tail_len = 0.0, 0
+                
+                for block in f.blocks(blocksize=blocksize, dtype='float32', always_2d=True):
+                    block = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+                    block_sumsq, tail_sumsq, tail_len = self._windowed_stats(block, window_samples)
+                    sumsq[written:written + len(block_sumsq)] = block_sumsq
+                    written += len(block_sumsq)
+        except Exception as e:
+            self.logger.debug(f"流式读取音频失败，改为整体读取: {e}")
+            return None
+        
+        return sample_rate, window_samples, (sumsq[:written], tail_sumsq, tail_len), total_frames
+    
+    @classmethod
+    def _window_rms(cls, audio_data: np.ndarray, window_samples: int, min_tail: int = 1) -> np.ndarray:
+        """
+        按固定窗口向量化计算RMS
+        
+        Args:
+            audio_data: 单声道音频数据
+            window_samples: 窗口采样数
+            min_tail: 末尾不足一个窗口时，保留该窗口所需的最少采样数
+            
+        Returns:
+            每个窗口的RMS数组
+        """
+        stats = cls._windowed_stats(audio_data, window_samples)
+        return cls._stats_rms(stats, window_samples, min_tail=min_tail)
+    
+    def _frame_rms(self, audio_data: np.ndarray, sample_rate: int, window_size: float,
+                   hop_size: Optional[float]) -> Tuple[np.ndarray, int]:
+        """
+        计算分析帧的RMS，hop_size小于窗口时使用重叠帧
+        
+        Args:
+            audio_data: 单声道音频数据
+            sample_rate: 采样率
+            window_size: 窗口大小（秒）
+            hop_size: 帧移（秒），None表示不重叠
+            
+        Returns:
+            (每帧RMS数组, 帧移采样数)
+        """
+        window_samples = int(window_size * sample_rate)
+        hop_samples = int(hop_size * sample_rate) if hop_size else window_samples
+        
+        if hop_samples <= 0 or hop_samples >= window_samples:
+            return self._window_rms(audio_data, window_samples, window_samples // 2), window_samples
+        
+        if len(audio_data) < window_samples:
+            return np.empty(0, dtype=np.float32), hop_samples
+        
+        # 重叠帧为原数组的跨步视图，不复制数据
+        frames = sliding_window_view(audio_data, window_samples)[::hop_samples]
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames, dtype=np.float32) / np.float32(window_samples))
+        return rms, hop_samples
+    
     def detect_volume_changes(self, audio_path: str, 
                             window_size: float = 1.0,
-                            threshold: float = 0.3) -> List[Dict]:
+                            threshold: float = 0.3,
+                            hop_size: Optional[float] = None) -> List[Dict]:
         """
         检测音量变化点
         
@@ -70,37 +314,43 @@ class AudioAnalyzer(LoggerMixin):
             audio_path: 音频文件路径
             window_size: 窗口大小（秒）
             threshold: 变化阈值（0-1）
+            hop_size: 帧移（秒），小于窗口时使用重叠窗口，None表示不重叠
             
         Returns:
             音量变化点列表
         """
         sample_rate, audio_data = self.load_audio(audio_path)
+        return self.detect_volume_changes_from_data(audio_data, sample_rate, window_size, threshold, hop_size)
+    
+    def detect_volume_changes_from_data(self, audio_data: np.ndarray,
+                                        sample_rate: int,
+                                        window_size: float = 1.0,
+                                        threshold: float = 0.3,
+                                        hop_size: Optional[float] = None) -> List[Dict]:
+        """
+        基于已加载的音频数据检测音量变化点，避免重复读取文件。
+        """
+        rms, hop_samples = self._frame_rms(audio_data, sample_rate, window_size, hop_size)
+        return self._volume_changes_from_rms(rms, hop_samples, sample_rate, threshold)
+    
+    def _volume_changes_from_rms(self, rms: np.ndarray, window_samples: int,
+                                 sample_rate: int, threshold: float) -> List[Dict]:
+        """由窗口RMS数组检测音量变化点"""
+        # 相邻窗口RMS变化率
+        prev_rms = rms[:-1]
+        curr_rms = rms[1:]
+        change_ratio = np.abs(curr_rms - prev_rms) / np.maximum(prev_rms, 1e-6)
+        indices = np.flatnonzero((prev_rms > 1e-6) & (change_ratio > threshold))
         
-        changes = []
-        window_samples = int(window_size * sample_rate)
-        prev_rms = None
-        
-        for i in range(0, len(audio_data), window_samples):
-            window = audio_data[i:i + window_samples]
-            if len(window) < window_samples // 2:
-                break
-            
-            # 计算RMS（均方根）音量
-            rms = np.sqrt(np.mean(window**2))
-            time_seconds = i / sample_rate
-            
-            if prev_rms is not None and prev_rms > 1e-6:
-                change_ratio = abs(rms - prev_rms) / max(prev_rms, 1e-6)
-                
-                if change_ratio > threshold:
-                    changes.append({
-                        'time': time_seconds,
-                        'prev_volume': float(prev_rms),
-                        'curr_volume': float(rms),
-                        'change_ratio': float(change_ratio)
-                    })
-            
-            prev_rms = rms
+        changes = [
+            {
+                'time': (i + 1) * window_samples / sample_rate,
+                'prev_volume': float(prev_rms[i]),
+                'curr_volume': float(curr_rms[i]),
+                'change_ratio': float(change_ratio[i])
+            }
+            for i in indices.tolist()
+        ]
         
         self.logger.info(f"检测到 {len(changes)} 个音量变化点")
         return changes
@@ -120,75 +370,99 @@ class AudioAnalyzer(LoggerMixin):
             静音段时间列表 [(start_sec, end_sec), ...]
         """
         sample_rate, audio_data = self.load_audio(audio_path)
-        
+        return self.detect_silence_from_data(audio_data, sample_rate, min_silence_len, silence_thresh)
+    
+    def detect_silence_from_data(self, audio_data: np.ndarray,
+                                 sample_rate: int,
+                                 min_silence_len: float = 1.0,
+                                 silence_thresh: float = 0.01) -> List[Tuple[float, float]]:
+        """
+        基于已加载的音频数据检测静音段，避免重复读取文件。
+        """
         # 计算每个窗口的能量
         window_samples = int(0.1 * sample_rate)  # 100ms窗口
-        is_silent = []
-        
-        for i in range(0, len(audio_data), window_samples):
-            window = audio_data[i:i + window_samples]
-            rms = np.sqrt(np.mean(window**2))
-            is_silent.append(rms < silence_thresh)
+        rms = self._window_rms(audio_data, window_samples)
+        return self._silence_from_rms(rms, min_silence_len, silence_thresh)
+    
+    def _silence_from_rms(self, rms: np.ndarray, min_silence_len: float,
+                          silence_thresh: float) -> List[Tuple[float, float]]:
+        """由100ms窗口RMS数组检测静音段"""
+        is_silent = (rms < silence_thresh).astype(np.int8)
         
-        # 查找连续的静音段
-        silence_ranges = []
-        start = None
+        # 通过0/1跳变一次性找出所有连续静音段的起止窗口
+        edges = np.diff(np.concatenate(([0], is_silent, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
         min_windows = int(min_silence_len / 0.1)
+        keep = (ends - starts) >= min_windows
         
-        for i, silent in enumerate(is_silent):
-            if silent and start is None:
-                start = i
-            elif not silent and start is not None:
-                if i - start >= min_windows:
-                    start_sec = start * 0.1
-                    end_sec = i * 0.1
-                    silence_ranges.append((start_sec, end_sec))
-                start = None
-        
-        # 处理最后一个静音段
-        if start is not None and len(is_silent) - start >= min_windows:
-            start_sec = start * 0.1
-            end_sec = len(is_silent) * 0.1
-            silence_ranges.append((start_sec, end_sec))
+        silence_ranges = [
+            (start * 0.1, end * 0.1)
+            for start, end in zip(starts[keep].tolist(), ends[keep].tolist())
+        ]
         
         self.logger.info(f"检测到 {len(silence_ranges)} 个静音段")
         return silence_ranges
     
     def analyze_audio_energy(self, audio_path: str, 
-                            segment_duration: float = 0.5) -> List[Dict]:
+                            segment_duration: float = 0.5,
+                            hop_size: Optional[float] = None) -> EnergyFrames:
         """
         分析音频能量分布
         
         Args:
             audio_path: 音频文件路径
             segment_duration: 分段时长（秒）
+            hop_size: 帧移（秒），小于分段时长时使用重叠分段，None表示不重叠
             
         Returns:
-            能量分析结果列表
+            能量分析结果 EnergyFrames(time, energy, db)
         """
-        sample_rate, audio_data = self.load_audio(audio_path)
+        if hop_size is None:
+            streamed = self._stream_windowed_stats(audio_path, segment_duration)
+            if streamed is not None:
+                sample_rate, segment_samples, stats, _ = streamed
+                rms = self._stats_rms(stats, segment_samples, min_tail=segment_samples // 2)
+                return self._energy_from_rms(rms, segment_samples, sample_rate)
         
-        segment_samples = int(segment_duration * sample_rate)
-        energy_data = []
+        sample_rate, audio_data = self.load_audio(audio_path)
+        return self.analyze_audio_energy_from_data(audio_data, sample_rate, segment_duration, hop_size)
+    
+    def analyze_audio_energy_dicts(self, audio_path: str,
+                                   segment_duration: float = 0.5) -> List[Dict]:
+        """
+        分析音频能量分布（字典列表格式，兼容旧接口）
         
-        for i in range(0, len(audio_data), segment_samples):
-            segment = audio_data[i:i + segment_samples]
-            if len(segment) < segment_samples // 2:
-                break
-            
-            # 计算RMS能量
-            rms = np.sqrt(np.mean(segment**2))
-            
-            # 计算dB值
-            db = 20 * np.log10(rms + 1e-10)  # 避免log(0)
+        Args:
+            audio_path: 音频文件路径
+            segment_duration: 分段时长（秒）
             
-            energy_data.append({
-                'time': i / sample_rate,
-                'energy': float(rms),
-                'db': float(db)
-            })
-        
-        return energy_data
+        Returns:
+            能量分析结果列表，每项包含time, energy, db
+        """
+        frames = self.analyze_audio_energy(audio_path, segment_duration)
+        return [
+            {'time': time, 'energy': energy, 'db': db}
+            for time, energy, db in zip(frames.time.tolist(), frames.energy.tolist(), frames.db.tolist())
+        ]
+    
+    def analyze_audio_energy_from_data(self, audio_data: np.ndarray,
+                                       sample_rate: int,
+                                       segment_duration: float = 0.5,
+                                       hop_size: Optional[float] = None) -> EnergyFrames:
+        """
+        基于已加载的音频数据分析能量分布，避免重复读取文件。
+        """
+        rms, hop_samples = self._frame_rms(audio_data, sample_rate, segment_duration, hop_size)
+        return self._energy_from_rms(rms, hop_samples, sample_rate)
+    
+    @staticmethod
+    def _energy_from_rms(rms: np.ndarray, segment_samples: int, sample_rate: int) -> EnergyFrames:
+        """由窗口RMS数组生成能量分析结果"""
+        times = np.arange(len(rms)) * segment_samples / sample_rate
+        # 计算dB值
+        db = _DB_PER_LOG2 * np.log2(rms + np.float32(1e-10))  # 避免log(0)
+        return EnergyFrames(times, rms, db)
     
     def calculate_audio_score(self, audio_path: str, 
                             start_time: float, 
@@ -215,9 +489,13 @@ class AudioAnalyzer(LoggerMixin):
     def calculate_audio_score_from_data(self, audio_data: np.ndarray,
                                       sample_rate: int,
                                       start_time: float,
-                                      end_time: float) -> float:
+                                      end_time: float,
+                                      window_sumsq: Optional[np.ndarray] = None) -> float:
         """
         基于已加载的音频数据计算片段分数，避免重复读取文件。
+        
+        window_sumsq为整段音频按0.5秒窗口预先计算的平方和（见score_all_segments），
+        片段起点与窗口对齐时直接复用，无需重新遍历片段采样。
         """
         try:
             if sample_rate <= 0 or audio_data is None or len(audio_data) == 0:
@@ -229,28 +507,32 @@ class AudioAnalyzer(LoggerMixin):
             segment = audio_data[start_sample:end_sample]
             
             if len(segment) == 0:
-                self.logger.debug(f"音频片段为空: {start_time}-{end_time}")
+                self.logger.debug("音频片段为空: %s-%s", start_time, end_time)
                 return 0.0
             
             # 计算能量数据
             window_samples = int(0.5 * sample_rate)
-            energies = []
-            
-            for i in range(0, len(segment), window_samples):
-                window = segment[i:i + window_samples]
-                if len(window) > 0:
-                    rms = np.sqrt(np.mean(window**2))
-                    energies.append(rms)
+            if window_sumsq is not None and start_sample % window_samples == 0:
+                first = start_sample // window_samples
+                n_full = len(segment) // window_samples
+                tail = segment[n_full * window_samples:]
+                stats = (window_sumsq[first:first + n_full], float(np.dot(tail, tail)), len(tail))
+                energies = self._stats_rms(stats, window_samples)
+            else:
+                energies = self._window_rms(segment, window_samples)
             
-            if not energies:
+            if len(energies) == 0:
                 return 0.0
             
-            energies = np.array(energies)
+            # 近乎静音的片段（各窗口RMS均低于阈值）直接判0分，跳过统计计算
+            max_energy = np.max(energies)
+            if max_energy < 1e-3:
+                self.logger.debug("音频片段静音: %s-%s", start_time, end_time)
+                return 0.0
             
             # 计算统计特征
             avg_energy = np.mean(energies)
             energy_variance = np.var(energies)
-            max_energy = np.max(energies)
             
             # 对能量值进行合理归一化
             # 使用对数变换处理低能量值
@@ -258,11 +540,8 @@ class AudioAnalyzer(LoggerMixin):
             normalized_variance = min(energy_variance * 50, 1.0)  # 方差放大系数
             
             # 计算音量变化次数（更灵敏的阈值）
-            changes = 0
             threshold = max(0.01, avg_energy * 0.2)  # 动态阈值
-            for i in range(1, len(energies)):
-                if abs(energies[i] - energies[i-1]) > threshold:
-                    changes += 1
+            changes = int(np.count_nonzero(np.abs(np.diff(energies)) > threshold))
             change_score = min(changes / max(len(energies), 1) * 2, 1.0)
             
             # 综合评分（调整权重）
@@ -275,9 +554,8 @@ class AudioAnalyzer(LoggerMixin):
             final_score = min(score, 1.0)
             
             self.logger.debug(
-                f"音频分数 {start_time:.1f}-{end_time:.1f}s: "
-                f"avg={normalized_avg:.3f}, var={normalized_variance:.3f}, "
-                f"change={change_score:.3f}, final={final_score:.3f}"
+                "音频分数 %.1f-%.1fs: avg=%.3f, var=%.3f, change=%.3f, final=%.3f",
+                start_time, end_time, normalized_avg, normalized_variance, change_score, final_score
             )
             
             return final_score
@@ -286,6 +564,33 @@ class AudioAnalyzer(LoggerMixin):
             self.logger.error(f"计算音频分数失败: {e}")
             return 0.0
     
+    def score_all_segments(self, audio_data: np.ndarray, sample_rate: int,
+                           starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        批量计算多个片段的音频分数
+        
+        整段音频只计算一次0.5秒窗口平方和，各片段按切片复用，
+        结果与逐个调用calculate_audio_score_from_data一致。
+        
+        Args:
+            audio_data: 单声道音频数据
+            sample_rate: 采样率
+            starts: 片段开始时间数组（秒）
+            ends: 片段结束时间数组（秒）
+            
+        Returns:
+            各片段音频分数数组（0-1）
+        """
+        window_sumsq = None
+        window_samples = int(0.5 * sample_rate) if sample_rate > 0 else 0
+        if window_samples > 0 and audio_data is not None and len(audio_data) > 0:
+            window_sumsq = self._windowed_stats(audio_data, window_samples)[0]
+        
+        return np.array([
+            self.calculate_audio_score_from_data(audio_data, sample_rate, start_time, end_time, window_sumsq)
+            for start_time, end_time in zip(np.asarray(starts).tolist(), np.asarray(ends).tolist())
+        ], dtype=np.float64)
+    
     def get_audio_features(self, audio_path: str) -> Dict:
         """
         获取音频的综合特征
@@ -296,25 +601,48 @@ class AudioAnalyzer(LoggerMixin):
         Returns:
             特征字典
         """
-        sample_rate, audio_data = self.load_audio(audio_path)
-        duration = len(audio_data) / sample_rate
+        # 单次遍历计算100ms基础窗口统计，0.5秒/1秒窗口由其合并得到；
+        # 优先分块流式读取，否则只读取一次音频，各项分析共享同一份数据
+        streamed = self._stream_windowed_stats(audio_path, 0.1)
+        if streamed is not None:
+            sample_rate, base_samples, stats, total_frames = streamed
+            audio_data = None
+        else:
+            sample_rate, audio_data = self.load_audio(audio_path)
+            base_samples = int(0.1 * sample_rate)
+            stats = self._windowed_stats(audio_data, base_samples)
+            total_frames = len(audio_data)
+        duration = total_frames / sample_rate
         
         # 能量分析
-        energy_data = self.analyze_audio_energy(audio_path)
-        energies = [d['energy'] for d in energy_data]
+        segment_samples = int(0.5 * sample_rate)
+        if segment_samples == base_samples * 5:
+            rms = self._stats_rms(stats, base_samples, 5, segment_samples // 2)
+            energies = self._energy_from_rms(rms, segment_samples, sample_rate).energy
+        else:
+            if audio_data is None:
+                sample_rate, audio_data = self.load_audio(audio_path)
+            energies = self.analyze_audio_energy_from_data(audio_data, sample_rate).energy
         
         # 音量变化
-        volume_changes = self.detect_volume_changes(audio_path)
+        window_samples = int(1.0 * sample_rate)
+        if window_samples == base_samples * 10:
+            rms = self._stats_rms(stats, base_samples, 10, window_samples // 2)
+            volume_changes = self._volume_changes_from_rms(rms, window_samples, sample_rate, 0.3)
+        else:
+            if audio_data is None:
+                sample_rate, audio_data = self.load_audio(audio_path)
+            volume_changes = self.detect_volume_changes_from_data(audio_data, sample_rate)
         
         # 静音检测
-        silence_ranges = self.detect_silence(audio_path)
+        silence_ranges = self._silence_from_rms(self._stats_rms(stats, base_samples), 1.0, 0.01)
         silence_duration = sum(end - start for start, end in silence_ranges)
         
         features = {
             'duration': duration,
-            'avg_energy': float(np.mean(energies)) if energies else 0,
-            'max_energy': float(np.max(energies)) if energies else 0,
-            'energy_variance': float(np.var(energies)) if energies else 0,
+            'avg_energy': float(np.mean(energies)) if len(energies) else 0,
+            'max_energy': float(np.max(energies)) if len(energies) else 0,
+            'energy_variance': float(np.var(energies)) if len(energies) else 0,
             'volume_changes': len(volume_changes),
             'silence_count': len(silence_ranges),
             'silence_duration': silence_duration,
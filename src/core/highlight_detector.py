@@ -4,9 +4,16 @@
 支持策略模式，为不同类型视频提供定制化检测
 """
 
+import os
+import math
+import heapq
+import logging
+import threading
 import numpy as np
 import cv2
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterator, Union
 from pathlib import Path
 from core.audio_analyzer import AudioAnalyzer
 from core.video_analyzer import VideoAnalyzer
@@ -16,7 +23,126 @@ from core.detection_strategies import (
     GenericDetectionStrategy, VideoTypeDetector
 )
 from utils.logger import LoggerMixin
+from utils.config import get_config
 from utils.temp_file_manager import get_temp_manager
+from utils.jit import njit
+
+
+# 相邻片段合并的最大间隙（秒）
+MERGE_MAX_GAP = 2.0
+
+
+@njit(cache=True)
+def _merge_groups(starts, ends, durations, scores, target_duration):
+    """
+    计算相邻片段的合并分组
+
+    Args:
+        starts: 按时间排序的片段开始时间数组
+        ends: 片段结束时间数组
+        durations: 片段时长数组
+        scores: 片段分数数组
+        target_duration: 目标时长
+
+    Returns:
+        (每组首个片段索引, 每组最后片段索引, 合并后分数)
+    """
+    n = starts.shape[0]
+    firsts = np.empty(n, np.int64)
+    lasts = np.empty(n, np.int64)
+    merged_scores = np.empty(n, np.float64)
+    max_duration = target_duration * 1.2
+    current_duration = 0.0
+    k = 0
+    i = 0
+    while i < n and current_duration < target_duration:
+        group_end = ends[i]
+        group_duration = durations[i]
+        score = scores[i]
+        j = i + 1
+        while j < n and starts[j] - group_end <= MERGE_MAX_GAP:
+            merged_duration = ends[j] - starts[i]
+            if current_duration + merged_duration > max_duration:
+                break
+            group_end = ends[j]
+            group_duration = merged_duration
+            score = (score + scores[j]) / 2
+            j += 1
+        firsts[k] = i
+        lasts[k] = j - 1
+        merged_scores[k] = score
+        k += 1
+        current_duration += group_duration
+        i = j
+    return firsts[:k], lasts[:k], merged_scores[:k]
+
+
+@dataclass
+class SegmentTable:
+    """片段分析结果（SoA）：各字段为等长的NumPy数组，按需再转换为字典"""
+    index: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    duration: np.ndarray
+    score: np.ndarray
+    records: Optional[List[Dict]] = None  # 由字典列表构造时保留原对象
+    
+    @classmethod
+    def allocate(cls, num_segments: int) -> 'SegmentTable':
+        """预分配指定长度的空表"""
+        return cls(
+            index=np.arange(num_segments, dtype=np.int32),
+            start=np.empty(num_segments, dtype=np.float64),
+            end=np.empty(num_segments, dtype=np.float64),
+            duration=np.empty(num_segments, dtype=np.float64),
+            score=np.empty(num_segments, dtype=np.float64)
+        )
+    
+    @classmethod
+    def from_dicts(cls, segments: List[Dict]) -> 'SegmentTable':
+        """由片段字典列表构造，row()返回原字典对象"""
+        n = len(segments)
+        return cls(
+            index=np.fromiter((s['index'] for s in segments), dtype=np.int32, count=n),
+            start=np.fromiter((s['start_time'] for s in segments), dtype=np.float64, count=n),
+            end=np.fromiter((s['end_time'] for s in segments), dtype=np.float64, count=n),
+            duration=np.fromiter((s['duration'] for s in segments), dtype=np.float64, count=n),
+            score=np.fromiter((s['score'] for s in segments), dtype=np.float64, count=n),
+            records=segments
+        )
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def row(self, i: int) -> Dict:
+        """获取第i行的片段字典"""
+        if self.records is not None:
+            return self.records[i]
+        return {
+            'index': int(self.index[i]),
+            'start_time': float(self.start[i]),
+            'end_time': float(self.end[i]),
+            'duration': float(self.duration[i]),
+            'score': float(self.score[i])
+        }
+    
+    def by_score(self) -> np.ndarray:
+        """按分数从高到低排列的行号（同分保持原顺序）"""
+        return np.argsort(-self.score, kind='stable')
+    
+    def to_dicts(self, rows=None) -> List[Dict]:
+        """
+        转换为片段字典列表
+        
+        Args:
+            rows: 需要转换的行号序列，None表示全部
+            
+        Returns:
+            片段字典列表
+        """
+        if rows is None:
+            rows = range(len(self))
+        return [self.row(i) for i in rows]
 
 
 class HighlightDetector(LoggerMixin):
@@ -36,6 +162,7 @@ class HighlightDetector(LoggerMixin):
             strategy: 检测策略，如果为None则使用默认权重
         """
         super().__init__()
+        self.config = get_config()
 
         # 策略模式支持
         self.strategy = strategy
@@ -56,24 +183,45 @@ class HighlightDetector(LoggerMixin):
         self.video_processor = VideoProcessor()
         self.type_detector = VideoTypeDetector()
     
-    def analyze_video(self, video_path: str, segment_duration: float = 10.0) -> List[Dict]:
+    def analyze_video(self, video_path: str, segment_duration: float = 10.0,
+                      video_info: Optional[Dict] = None) -> List[Dict]:
         """
         分析视频，将其分段并计算每段的兴趣度分数
         
         Args:
             video_path: 视频文件路径
             segment_duration: 分段时长（秒）
+            video_info: 已获取的视频信息，None时重新读取
+            
+        Returns:
+            分段分析结果列表（按分数从高到低）
+        """
+        table = self.analyze_video_table(video_path, segment_duration, video_info)
+        if table is None:
+            return []
+        return table.to_dicts(table.by_score())
+    
+    def analyze_video_table(self, video_path: str, segment_duration: float = 10.0,
+                            video_info: Optional[Dict] = None) -> Optional[SegmentTable]:
+        """
+        分析视频，将其分段并计算每段的兴趣度分数（SoA结果）
+        
+        Args:
+            video_path: 视频文件路径
+            segment_duration: 分段时长（秒）
+            video_info: 已获取的视频信息，None时重新读取
             
         Returns:
-            分段分析结果列表
+            按时间顺序排列的片段表，失败时返回None
         """
         self.logger.info(f"开始分析视频: {video_path}")
         
         # 获取视频信息
-        video_info = self.video_processor.get_video_info(video_path)
+        if video_info is None:
+            video_info = self.video_processor.get_video_info(video_path)
         if not video_info:
             self.logger.error("无法获取视频信息")
-            return []
+            return None
         
         total_duration = video_info['duration']
         self.logger.info(f"视频总时长: {total_duration:.2f}秒")
@@ -89,81 +237,121 @@ class HighlightDetector(LoggerMixin):
         
         self.logger.debug(f"临时音频文件: {temp_audio_path}")
         
-        if not self.video_processor.extract_audio(video_path, str(temp_audio_path)):
-            self.logger.error("音频提取失败")
-            return []
-        
-        # 验证临时文件是否创建成功
-        if not temp_audio_path.exists():
-            self.logger.error(f"临时音频文件未创建: {temp_audio_path}")
-            return []
+        if not video_info.get('audio_codec'):
+            self.logger.error("音频提取失败: 视频不包含音轨")
+            return None
         
+        captures = []
+        # 音频提取是独立的FFmpeg子进程，在后台线程中与视频评分并行进行
+        audio_executor = ThreadPoolExecutor(max_workers=1)
         try:
-            sample_rate, audio_data = self.audio_analyzer.load_audio(str(temp_audio_path))
+            audio_future = audio_executor.submit(
+                self.video_processor.extract_audio, video_path, str(temp_audio_path)
+            )
             cap = cv2.VideoCapture(video_path)
+            captures.append(cap)
             if not cap.isOpened():
                 self.logger.error(f"无法打开视频进行分析: {video_path}")
-                return []
+                return None
 
             fps = cap.get(cv2.CAP_PROP_FPS)
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
             # 分段分析
-            segments = []
-            num_segments = int(np.ceil(total_duration / segment_duration))
-            
-            for i in range(num_segments):
+            num_segments = math.ceil(total_duration / segment_duration)
+            context = {
+                'video_type': self.strategy.strategy_name if self.strategy else None,
+                'total_duration': total_duration
+            }
+
+            # 各片段相互独立，使用线程池并行评分（OpenCV解码和NumPy运算会释放GIL）。
+            # VideoCapture不能跨线程共享，每个工作线程持有自己的视频句柄。
+            local = threading.local()
+            spare_captures = [cap]  # 主视频句柄交给第一个工作线程复用
+            captures_lock = threading.Lock()
+
+            def get_capture():
+                thread_cap = getattr(local, 'cap', None)
+                if thread_cap is None:
+                    with captures_lock:
+                        if spare_captures:
+                            thread_cap = spare_captures.pop()
+                        else:
+                            thread_cap = cv2.VideoCapture(video_path)
+                            captures.append(thread_cap)
+                    local.cap = thread_cap
+                return thread_cap
+
+            # 片段边界一次性向量化计算，结果直接写入预分配的数组
+            table = SegmentTable.allocate(num_segments)
+            starts, ends = table.start, table.end
+            np.multiply(table.index, segment_duration, out=starts)
+            np.minimum((table.index + 1) * segment_duration, total_duration, out=ends)
+            np.subtract(ends, starts, out=table.duration)
+
+            def score_one(i: int) -> float:
                 start_time = i * segment_duration
                 end_time = min((i + 1) * segment_duration, total_duration)
-                
-                # 计算综合分数
-                score = self.calculate_segment_score(
-                    video_path,
-                    str(temp_audio_path),
-                    start_time, 
-                    end_time, 
-                    total_duration,
-                    audio_data=audio_data,
-                    sample_rate=sample_rate,
-                    video_capture=cap,
-                    fps=fps,
-                    total_frames=total_frames
+                return self.video_analyzer.calculate_video_score_from_capture(
+                    get_capture(), fps or 0, start_time, end_time, total_frames
                 )
 
-                context = {
-                    'video_type': self.strategy.strategy_name if self.strategy else None,
-                    'total_duration': total_duration
-                }
-                score = self.strategy.adjust_score(score, {
-                    'index': i,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'duration': end_time - start_time,
-                    'score': score
-                }, context) if self.strategy else score
-                
-                segments.append({
-                    'index': i,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'duration': end_time - start_time,
-                    'score': score
-                })
-                
-                self.logger.debug(f"片段 {i+1}/{num_segments}: {start_time:.1f}s-{end_time:.1f}s, 分数: {score:.3f}")
+            max_workers = self.config.get('processing.analysis_workers', min(4, os.cpu_count() or 1))
+            max_workers = max(1, min(int(max_workers), num_segments))
+
+            if max_workers == 1:
+                video_scores = [score_one(i) for i in range(num_segments)]
+            else:
+                self.logger.info(f"并行分析 {num_segments} 个片段 (并发数: {max_workers})")
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    video_scores = list(executor.map(score_one, range(num_segments)))
+
+            # 视频评分完成后再等待音频提取结果
+            if not audio_future.result():
+                self.logger.error("音频提取失败")
+                return None
             
-            # 按分数排序
-            segments.sort(key=lambda x: x['score'], reverse=True)
+            # 验证临时文件是否创建成功
+            if not temp_audio_path.exists():
+                self.logger.error(f"临时音频文件未创建: {temp_audio_path}")
+                return None
+
+            # 音频分数：整段音频只计算一次窗口能量，各片段按切片复用
+            sample_rate, audio_data = self.audio_analyzer.load_audio(str(temp_audio_path))
+            audio_scores = self.audio_analyzer.score_all_segments(audio_data, sample_rate, starts, ends)
+
+            # 时间位置分数与综合分数对所有片段一次性向量化计算
+            np.minimum(
+                audio_scores * self.audio_weight +
+                np.asarray(video_scores, dtype=np.float64) * self.video_weight +
+                self._time_scores(starts, ends, total_duration) * self.time_weight,
+                1.0,
+                out=table.score
+            )
+
+            # 策略接口基于字典，逐行临时构造
+            if self.strategy:
+                for i in range(num_segments):
+                    table.score[i] = self.strategy.adjust_score(float(table.score[i]), table.row(i), context)
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for i, (start_time, end_time, score) in enumerate(zip(starts.tolist(), ends.tolist(),
+                                                                      table.score.tolist())):
+                    self.logger.debug("片段 %d/%d: %.1fs-%.1fs, 分数: %.3f",
+                                      i + 1, num_segments, start_time, end_time, score)
             
-            self.logger.info(f"视频分析完成，共 {len(segments)} 个片段")
-            return segments
+            self.logger.info(f"视频分析完成，共 {num_segments} 个片段")
+            return table
             
         finally:
-            try:
-                if 'cap' in locals() and cap is not None:
-                    cap.release()
-            except Exception as e:
-                self.logger.warning(f"释放视频句柄失败: {e}")
+            # 提前返回时也要等待音频提取结束，再清理临时文件
+            audio_executor.shutdown(wait=True)
+            
+            for capture in captures:
+                try:
+                    capture.release()
+                except Exception as e:
+                    self.logger.warning(f"释放视频句柄失败: {e}")
 
             # 确保清理临时文件
             try:
@@ -194,6 +382,42 @@ class HighlightDetector(LoggerMixin):
         Returns:
             综合分数（0-1）
         """
+        audio_score, video_score = self._component_scores(
+            video_path, audio_path, start_time, end_time,
+            audio_data=audio_data,
+            sample_rate=sample_rate,
+            video_capture=video_capture,
+            fps=fps,
+            total_frames=total_frames
+        )
+
+        # 时间位置分数（避免过度偏向开头和结尾）
+        time_position = (start_time + end_time) / 2
+        normalized_position = time_position / total_duration if total_duration > 0 else 0.5
+        time_score = 1 - abs(normalized_position - 0.5) * 2
+        
+        # 综合分数
+        composite_score = (
+            audio_score * self.audio_weight +
+            video_score * self.video_weight +
+            time_score * self.time_weight
+        )
+        
+        return min(composite_score, 1.0)
+
+    def _component_scores(self, video_path: str, audio_path: str,
+                          start_time: float, end_time: float,
+                          audio_data=None,
+                          sample_rate: int = None,
+                          video_capture=None,
+                          fps: float = None,
+                          total_frames: int = 0) -> Tuple[float, float]:
+        """
+        计算单个片段的音频分数和视频分数
+
+        Returns:
+            (音频分数, 视频分数)
+        """
         # 音频分数
         if audio_data is not None and sample_rate:
             audio_score = self.audio_analyzer.calculate_audio_score_from_data(
@@ -213,50 +437,65 @@ class HighlightDetector(LoggerMixin):
             video_score = self.video_analyzer.calculate_video_score(
                 video_path, start_time, end_time
             )
-        
-        # 时间位置分数（避免过度偏向开头和结尾）
-        time_position = (start_time + end_time) / 2
-        normalized_position = time_position / total_duration if total_duration > 0 else 0.5
-        time_score = 1 - abs(normalized_position - 0.5) * 2
-        
-        # 综合分数
-        composite_score = (
-            audio_score * self.audio_weight +
-            video_score * self.video_weight +
-            time_score * self.time_weight
-        )
-        
-        return min(composite_score, 1.0)
+
+        return audio_score, video_score
+
+    @staticmethod
+    def _time_scores(starts: np.ndarray, ends: np.ndarray, total_duration: float) -> np.ndarray:
+        """
+        计算时间位置分数（片段越靠近视频中部分数越高）
+
+        Args:
+            starts: 片段开始时间
+            ends: 片段结束时间
+            total_duration: 视频总时长
+
+        Returns:
+            时间位置分数（0-1）
+        """
+        if total_duration <= 0:
+            return np.ones_like(starts)
+        normalized_position = (starts + ends) / 2 / total_duration
+        return 1 - np.abs(normalized_position - 0.5) * 2
     
-    def select_highlights(self, segments: List[Dict], 
+    def select_highlights(self, segments: Union[SegmentTable, List[Dict]], 
                          target_duration: float,
-                         min_segment_duration: float = 5.0) -> List[Dict]:
+                         min_segment_duration: float = 5.0,
+                         prefiltered: Optional[Dict[float, List[int]]] = None) -> List[Dict]:
         """
         从分段中选择高光片段
         
         Args:
-            segments: 分段分析结果
+            segments: 分段分析结果（SegmentTable或片段字典列表）
             target_duration: 目标总时长（秒）
             min_segment_duration: 最小片段时长（秒）
+            prefiltered: _rows_by_min_duration的预过滤结果，需包含min_segment_duration和3.0
             
         Returns:
             选中的高光片段列表
         """
         self.logger.info(f"开始选择高光片段，目标时长: {target_duration}秒")
         
-        if not segments:
+        if len(segments) == 0:
             self.logger.warning("没有可用的片段")
             return []
         
+        # 统一按行号在SoA数组上选择，只为选中的片段构造字典
+        table = segments if isinstance(segments, SegmentTable) else SegmentTable.from_dicts(segments)
+        durations = table.duration.tolist()
+        scores = table.score.tolist()
+        
         # 过滤太短的片段
-        valid_segments = [s for s in segments if s['duration'] >= min_segment_duration]
+        if prefiltered is None:
+            prefiltered = self._rows_by_min_duration(table, (min_segment_duration, 3.0))
+        valid_rows = prefiltered[min_segment_duration]
         
-        if not valid_segments:
+        if not valid_rows:
             self.logger.warning(f"没有满足最小时长({min_segment_duration}s)的片段")
             # 如果没有满足最小时长的片段，降低标准
-            valid_segments = [s for s in segments if s['duration'] >= 3.0]
-            if not valid_segments:
-                valid_segments = segments  # 最后手段：使用所有片段
+            valid_rows = prefiltered[3.0]
+            if not valid_rows:
+                valid_rows = list(range(len(table)))  # 最后手段：使用所有片段
         
         # 按分数排序
         if self.strategy:
@@ -264,60 +503,52 @@ class HighlightDetector(LoggerMixin):
                 'target_duration': target_duration,
                 'min_segment_duration': min_segment_duration
             }
-            valid_segments = [s for s in valid_segments if self.strategy.should_include_segment(s, context)]
+            valid_rows = [i for i in valid_rows if self.strategy.should_include_segment(table.row(i), context)]
 
-        if not valid_segments:
+        if not valid_rows:
             self.logger.warning("策略过滤后没有可用片段，回退为按分数选择")
-            valid_segments = [s for s in segments if s['duration'] >= min_segment_duration] or segments
+            valid_rows = prefiltered[min_segment_duration] or list(range(len(table)))
 
-        sorted_segments = sorted(valid_segments, key=lambda x: x['score'], reverse=True)
+        # 贪心选择通常只消耗前K个高分片段，先用堆取TopK，不够时再完整排序
+        if min_segment_duration > 0:
+            top_k = max(8, int(target_duration / min_segment_duration) * 2)
+        else:
+            top_k = len(valid_rows)
+        top_rows = heapq.nlargest(top_k, valid_rows, key=scores.__getitem__)
         
-        self.logger.debug(f"有效片段数: {len(valid_segments)}, 最高分数: {sorted_segments[0]['score']:.3f}")
+        self.logger.debug(f"有效片段数: {len(valid_rows)}, 最高分数: {scores[top_rows[0]]:.3f}")
         
         selected = []
         current_duration = 0
         min_target = target_duration * 0.8  # 最小目标时长
         max_target = target_duration * 1.2  # 最大目标时长
         
-        # 第一轮：优先选择高分片段
-        for segment in sorted_segments:
-            if current_duration + segment['duration'] <= max_target:
+        # 按分数从高到低单遍贪心选择。若遍历完仍未达到最小目标，说明剩余片段
+        # 都已因超出最大目标被跳过，之后累计时长只增不减，无需再补充一轮
+        for i in self._iter_by_score(valid_rows, top_rows, scores):
+            if current_duration + durations[i] <= max_target:
+                segment = table.row(i)
                 selected.append(segment)
-                current_duration += segment['duration']
-                self.logger.debug(
-                    f"选择片段: {segment['start_time']:.1f}s-{segment['end_time']:.1f}s, "
-                    f"分数: {segment['score']:.3f}, 累计: {current_duration:.1f}s"
-                )
+                current_duration += durations[i]
+                self.logger.debug("选择片段: %.1fs-%.1fs, 分数: %.3f, 累计: %.1fs",
+                                  segment['start_time'], segment['end_time'], segment['score'], current_duration)
             
             # 如果达到最小目标，检查是否可以停止
             if current_duration >= min_target:
                 break
         
-        # 如果时长不足，尝试添加更多片段
         if current_duration < min_target:
-            self.logger.info(f"当前时长 {current_duration:.1f}s 低于最小目标 {min_target:.1f}s，尝试添加更多片段")
-            
-            selected_indices = {s['index'] for s in selected}
-            remaining_segments = [s for s in sorted_segments if s['index'] not in selected_indices]
-            
-            for segment in remaining_segments:
-                if current_duration + segment['duration'] <= max_target:
-                    selected.append(segment)
-                    current_duration += segment['duration']
-                    self.logger.debug(f"补充片段: {segment['start_time']:.1f}s-{segment['end_time']:.1f}s")
-                    
-                    if current_duration >= min_target:
-                        break
+            self.logger.info(f"当前时长 {current_duration:.1f}s 低于最小目标 {min_target:.1f}s，尝试合并相邻片段")
         
         # 如果仍然不足，尝试合并相邻片段
         if current_duration < min_target and len(selected) > 0:
             selected = self._merge_adjacent_segments(selected, target_duration)
-            current_duration = sum(s['duration'] for s in selected)
+            current_duration = self._total_duration(selected)
         
         # 按时间顺序排序
         selected.sort(key=lambda x: x['start_time'])
         
-        total_duration = sum(s['duration'] for s in selected)
+        total_duration = current_duration
         self.logger.info(
             f"选择了 {len(selected)} 个片段，总时长: {total_duration:.2f}秒 "
             f"(目标: {target_duration:.1f}s, 范围: {min_target:.1f}-{max_target:.1f}s)"
@@ -328,6 +559,64 @@ class HighlightDetector(LoggerMixin):
         
         return selected
     
+    @staticmethod
+    def _rows_by_min_duration(table: SegmentTable, thresholds) -> Dict[float, List[int]]:
+        """
+        按多个最小时长阈值一次性预过滤片段
+
+        对时长排序一次后用searchsorted定位各阈值，避免每个阈值都扫描全部片段。
+
+        Args:
+            table: 片段表
+            thresholds: 最小时长阈值序列
+
+        Returns:
+            阈值 -> 时长不小于该阈值的行号列表（按行号升序）
+        """
+        order = np.argsort(table.duration, kind='stable')
+        cuts = np.searchsorted(table.duration[order], thresholds, side='left')
+        return {threshold: np.sort(order[cut:]).tolist()
+                for threshold, cut in zip(thresholds, cuts.tolist())}
+    
+    @staticmethod
+    def _iter_by_score(rows: List[int], top_rows: List[int], scores: List[float]) -> Iterator[int]:
+        """
+        按分数从高到低迭代行号
+
+        先产出heapq.nlargest得到的前K行，只有调用方继续迭代时才对全部行排序，
+        整体顺序与sorted(rows, reverse=True)一致（同分保持原顺序）。
+
+        Args:
+            rows: 候选行号
+            top_rows: heapq.nlargest取得的高分行号
+            scores: 各行分数
+
+        Returns:
+            行号迭代器
+        """
+        yield from top_rows
+        if len(top_rows) < len(rows):
+            yield from sorted(rows, key=scores.__getitem__, reverse=True)[len(top_rows):]
+    
+    @staticmethod
+    def _field_array(segments: List[Dict], key: str) -> np.ndarray:
+        """
+        提取片段字典某个数值字段为数组
+
+        Args:
+            segments: 片段列表
+            key: 字段名
+
+        Returns:
+            float64数组
+        """
+        return np.fromiter((s[key] for s in segments), dtype=np.float64, count=len(segments))
+
+    @classmethod
+    def _total_duration(cls, segments: List[Dict]) -> float:
+        """计算片段总时长"""
+        return float(cls._field_array(segments, 'duration').sum())
+    
     def _merge_adjacent_segments(self, segments: List[Dict], target_duration: float) -> List[Dict]:
         """
         合并相邻的片段以达到目标时长
@@ -344,37 +633,24 @@ class HighlightDetector(LoggerMixin):
         
         # 按时间排序
         segments.sort(key=lambda x: x['start_time'])
-        
+
+        firsts, lasts, merged_scores = _merge_groups(
+            self._field_array(segments, 'start_time'),
+            self._field_array(segments, 'end_time'),
+            self._field_array(segments, 'duration'),
+            self._field_array(segments, 'score'),
+            float(target_duration)
+        )
+
+        # 只为输出的分组构造字典
         merged = []
-        current_duration = 0
-        
-        i = 0
-        while i < len(segments) and current_duration < target_duration:
-            current_segment = segments[i].copy()
-            
-            # 尝试与后续相邻片段合并
-            j = i + 1
-            while j < len(segments):
-                next_segment = segments[j]
-                gap = next_segment['start_time'] - current_segment['end_time']
-                
-                # 如果间隙小于2秒，尝试合并
-                if gap <= 2.0:
-                    # 合并片段
-                    merged_duration = next_segment['end_time'] - current_segment['start_time']
-                    if current_duration + merged_duration <= target_duration * 1.2:
-                        current_segment['end_time'] = next_segment['end_time']
-                        current_segment['duration'] = merged_duration
-                        current_segment['score'] = (current_segment['score'] + next_segment['score']) / 2
-                        j += 1
-                    else:
-                        break
-                else:
-                    break
-            
+        for first, last, score in zip(firsts.tolist(), lasts.tolist(), merged_scores.tolist()):
+            current_segment = segments[first].copy()
+            if last > first:
+                current_segment['end_time'] = segments[last]['end_time']
+                current_segment['duration'] = segments[last]['end_time'] - current_segment['start_time']
+                current_segment['score'] = score
             merged.append(current_segment)
-            current_duration += current_segment['duration']
-            i = j
         
         self.logger.debug(f"片段合并结果: {len(segments)} -> {len(merged)} 个片段")
         return merged
@@ -449,9 +725,9 @@ class HighlightDetector(LoggerMixin):
         self.logger.info(f"调整后目标时长: {adjusted_min:.1f}-{adjusted_max:.1f}秒")
         
         # 分析视频
-        segments = self.analyze_video(video_path, segment_duration)
+        segments = self.analyze_video_table(video_path, segment_duration, video_info)
         
-        if not segments:
+        if segments is None or len(segments) == 0:
             return {
                 'success': False,
                 'error': '视频分析失败 - 无法提取片段或分析失败'
@@ -459,13 +735,12 @@ class HighlightDetector(LoggerMixin):
         
         self.logger.info(f"视频分析完成，共 {len(segments)} 个片段")
         
-        # 显示前5个最高分数的片段
-        top_segments = sorted(segments, key=lambda x: x['score'], reverse=True)[:5]
-        for i, seg in enumerate(top_segments):
-            self.logger.debug(
-                f"Top {i+1}: {seg['start_time']:.1f}-{seg['end_time']:.1f}s, "
-                f"分数: {seg['score']:.3f}, 时长: {seg['duration']:.1f}s"
-            )
+        # 显示前5个最高分数的片段（未开启DEBUG时跳过排序）
+        if self.logger.isEnabledFor(logging.DEBUG):
+            top_segments = segments.to_dicts(segments.by_score()[:5])
+            for i, seg in enumerate(top_segments):
+                self.logger.debug("Top %d: %.1f-%.1fs, 分数: %.3f, 时长: %.1fs",
+                                  i + 1, seg['start_time'], seg['end_time'], seg['score'], seg['duration'])
         
         # 使用调整后的目标时长
         target_duration = (adjusted_min + adjusted_max) / 2
@@ -479,7 +754,7 @@ class HighlightDetector(LoggerMixin):
         
         # 准备时间段列表供视频剪辑使用
         time_ranges = [(h['start_time'], h['end_time']) for h in highlights]
-        total_duration = sum(h['duration'] for h in highlights)
+        total_duration = self._total_duration(highlights)
         
         # 检查是否在调整后的目标范围内
         in_range = adjusted_min <= total_duration <= adjusted_max
@@ -490,7 +765,7 @@ class HighlightDetector(LoggerMixin):
             'time_ranges': time_ranges,
             'total_duration': total_duration,
             'segment_count': len(highlights),
-            'average_score': np.mean([h['score'] for h in highlights]),
+            'average_score': float(self._field_array(highlights, 'score').mean()),
             'in_target_range': in_range,
             'target_min': adjusted_min,
             'target_max': adjusted_max,
@@ -545,13 +820,13 @@ class HighlightDetector(LoggerMixin):
         # 正常文件，使用原始目标
         return target_min, target_max
     
-    def _select_highlights_adaptive(self, segments: List[Dict], target_duration: float, 
+    def _select_highlights_adaptive(self, segments: SegmentTable, target_duration: float, 
                                    min_duration: float, file_size_mb: float) -> List[Dict]:
         """
         自适应选择高光片段
         
         Args:
-            segments: 分段列表
+            segments: 分段分析结果表
             target_duration: 目标时长
             min_duration: 最小时长
             file_size_mb: 文件大小
@@ -566,24 +841,25 @@ class HighlightDetector(LoggerMixin):
         else:
             min_segment_duration = 5.0
         
+        # 各轮选择共用同一份按时长阈值预过滤的结果
+        prefiltered = self._rows_by_min_duration(segments, (min_segment_duration, 3.0, 2.0))
+        
         # 尝试正常选择
-        highlights = self.select_highlights(segments, target_duration, min_segment_duration)
+        highlights = self.select_highlights(segments, target_duration, min_segment_duration, prefiltered)
         
-        if not highlights or sum(h['duration'] for h in highlights) < min_duration * 0.7:
+        if not highlights or self._total_duration(highlights) < min_duration * 0.7:
             # 如果选择结果不理想，使用更宽松的策略
             self.logger.warning("正常选择不理想，使用宽松策略")
             
             # 策略1：降低最小片段时长
-            highlights = self.select_highlights(segments, target_duration, 2.0)
+            highlights = self.select_highlights(segments, target_duration, 2.0, prefiltered)
             
-            if not highlights or sum(h['duration'] for h in highlights) < min_duration * 0.5:
+            if not highlights or self._total_duration(highlights) < min_duration * 0.5:
                 # 策略2：强制选择最高分片段
                 self.logger.warning("使用强制选择策略")
-                sorted_segments = sorted(segments, key=lambda x: x['score'], reverse=True)
-                
                 # 计算需要的片段数量
                 needed_segments = max(3, int(min_duration / 10))  # 最少选择3个片段
-                highlights = sorted_segments[:min(len(sorted_segments), needed_segments)]
+                highlights = segments.to_dicts(segments.by_score()[:needed_segments])
                 
                 # 按时间排序
                 highlights.sort(key=lambda x: x['start_time'])
@@ -3,16 +3,144 @@
 支持多种转场效果：淡入淡出、交叉溶解、滑动切换、缩放转场等
 """
 
+import os
 import cv2
+import queue
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Iterator
 from enum import Enum
 from utils.logger import setup_logger
+from utils.config import get_config
+from utils.command_runner import run_media_command
+from utils.jit import njit
 
 
 logger = setup_logger()
 
+# 转场窗口超过该字节数时分块多线程混合
+_PARALLEL_BLEND_MIN_BYTES = 64 * 1024 * 1024
+
+
+def _lerp_u8_numpy(frames1: np.ndarray, frames2: np.ndarray, alphas_q8: np.ndarray, out: np.ndarray) -> None:
+    """_lerp_u8的NumPy实现（numba不可用时使用）"""
+    base = frames1.astype(np.int32)
+    out[...] = base + (((frames2.astype(np.int32) - base) * alphas_q8[:, None]) >> 8)
+
+
+@njit(fallback=_lerp_u8_numpy, cache=True, nogil=True)
+def _lerp_u8(frames1, frames2, alphas_q8, out):
+    """
+    uint8定点线性插值：out[n] = frames1[n] + (frames2[n] - frames1[n]) * alphas_q8[n] / 256
+    结果恒在两帧像素值之间，无需饱和处理
+    :param frames1: 第一组帧（二维uint8，每行一帧）
+    :param frames2: 第二组帧（二维uint8，每行一帧）
+    :param alphas_q8: 每帧的第二帧权重，Q8定点数 (0 到 256)
+    :param out: 输出缓冲区（二维uint8）
+    """
+    for n in range(frames1.shape[0]):
+        alpha_q8 = np.int32(alphas_q8[n])
+        # 端点权重直接拷贝，无需逐像素插值
+        if alpha_q8 <= 0:
+            out[n, :] = frames1[n, :]
+            continue
+        if alpha_q8 >= 256:
+            out[n, :] = frames2[n, :]
+            continue
+        for i in range(frames1.shape[1]):
+            base = np.int32(frames1[n, i])
+            out[n, i] = base + (((np.int32(frames2[n, i]) - base) * alpha_q8) >> 8)
+
+
+def _to_q8(alphas) -> np.ndarray:
+    """权重 (0.0 到 1.0) 转为Q8定点数组"""
+    return (np.asarray(alphas, dtype=np.float64).reshape(-1) * 256 + 0.5).astype(np.int32)
+
+
+def _blend(frame1: np.ndarray, frame2: np.ndarray, alpha: float,
+           out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    按alpha混合两帧
+    :param frame1: 第一帧
+    :param frame2: 第二帧
+    :param alpha: 第二帧权重 (0.0 到 1.0)
+    :param out: 可选的输出缓冲区，形状与帧相同
+    :return: 混合后的帧
+    """
+    # 进度端点的结果就是其中一帧
+    if alpha <= 0.0:
+        return frame1
+    if alpha >= 1.0:
+        return frame2
+    
+    if frame1.dtype != np.uint8 or frame2.dtype != np.uint8 or frame1.shape != frame2.shape:
+        return cv2.addWeighted(frame1, 1.0 - alpha, frame2, alpha, 0)
+    
+    if out is None or out.shape != frame1.shape or not out.flags.c_contiguous:
+        out = np.empty_like(frame1)
+    _lerp_u8(np.ascontiguousarray(frame1).reshape(1, -1),
+             np.ascontiguousarray(frame2).reshape(1, -1),
+             _to_q8(alpha),
+             out.reshape(1, -1))
+    return out
+
+
+def _blend_batch(frames1: np.ndarray, frames2: np.ndarray,
+                 alphas: np.ndarray) -> Optional[np.ndarray]:
+    """
+    一次混合整段转场窗口
+    :param frames1: 第一组帧 (N, H, W, C)
+    :param frames2: 第二组帧 (N, H, W, C)
+    :param alphas: 每帧的第二帧权重 (N,)
+    :return: 混合后的帧 (N, H, W, C)；帧格式不支持时返回None
+    """
+    if frames1.dtype != np.uint8 or frames2.dtype != np.uint8 or frames1.shape != frames2.shape:
+        return None
+    
+    count = frames1.shape[0]
+    out = np.empty_like(frames1)
+    flat1 = np.ascontiguousarray(frames1).reshape(count, -1)
+    flat2 = np.ascontiguousarray(frames2).reshape(count, -1)
+    flat_out = out.reshape(count, -1)
+    alphas_q8 = _to_q8(alphas)
+    
+    workers = 1
+    if frames1.nbytes >= _PARALLEL_BLEND_MIN_BYTES:
+        workers = min(count, os.cpu_count() or 1)
+    
+    if workers <= 1:
+        _lerp_u8(flat1, flat2, alphas_q8, flat_out)
+        return out
+    
+    # 按帧分块，各线程直接读写同一组数组（内核释放GIL，无需拷贝到子进程）
+    bounds = np.linspace(0, count, workers + 1).astype(int)
+    
+    def blend_range(start: int, stop: int) -> None:
+        _lerp_u8(flat1[start:stop], flat2[start:stop], alphas_q8[start:stop], flat_out[start:stop])
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(blend_range, bounds[:-1], bounds[1:]))
+    return out
+
+
+def _concat(first: np.ndarray, second: np.ndarray, axis: int) -> np.ndarray:
+    """
+    拼接两块帧区域（axis=1为水平拼接，axis=0为垂直拼接）
+    :param first: 左侧/上方区域
+    :param second: 右侧/下方区域
+    :return: 拼接后的新帧
+    """
+    if first.shape[axis] == 0:
+        return second.copy()
+    if second.shape[axis] == 0:
+        return first.copy()
+    if axis == 1:
+        return cv2.hconcat([first, second])
+    return cv2.vconcat([first, second])
+
 
 class TransitionType(Enum):
     """转场类型枚举"""
@@ -39,37 +167,85 @@ class TransitionEffect:
         """
         self.duration = duration
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         应用转场效果
         :param frame1: 第一帧
         :param frame2: 第二帧
         :param progress: 进度 (0.0 到 1.0)
+        :param out: 可选的输出缓冲区，支持的效果会直接写入其中（返回值可能就是out）
         :return: 混合后的帧
         """
         raise NotImplementedError("子类必须实现此方法")
+    
+    def blend_weight(self, progress: float) -> Optional[float]:
+        """
+        纯线性混合类效果在给定进度下第二帧的权重
+        :param progress: 进度 (0.0 到 1.0)
+        :return: 第二帧权重；不是纯线性混合的效果返回None
+        """
+        return None
+    
+    def apply_batch(self, frames1: np.ndarray, frames2: np.ndarray,
+                    progresses: np.ndarray) -> np.ndarray:
+        """
+        对整段转场窗口应用转场效果
+        :param frames1: 第一组帧 (N, H, W, C)
+        :param frames2: 第二组帧 (N, H, W, C)
+        :param progresses: 每帧的进度 (N,)
+        :return: 混合后的帧 (N, H, W, C)
+        """
+        out = np.empty_like(frames1)
+        for i in range(len(progresses)):
+            blended = self.apply(frames1[i], frames2[i], float(progresses[i]), out=out[i])
+            if blended is not out[i]:
+                out[i] = blended
+        return out
 
 
 class FadeTransition(TransitionEffect):
     """淡入淡出转场"""
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """淡入淡出效果"""
-        alpha = progress
-        beta = 1.0 - progress
-        return cv2.addWeighted(frame1, beta, frame2, alpha, 0)
+        return _blend(frame1, frame2, progress, out)
+    
+    def blend_weight(self, progress: float) -> Optional[float]:
+        """第二帧权重随进度线性变化"""
+        return progress
+    
+    def apply_batch(self, frames1: np.ndarray, frames2: np.ndarray,
+                    progresses: np.ndarray) -> np.ndarray:
+        """整段窗口一次混合"""
+        blended = _blend_batch(frames1, frames2, progresses)
+        if blended is None:
+            return super().apply_batch(frames1, frames2, progresses)
+        return blended
 
 
 class DissolveTransition(TransitionEffect):
     """交叉溶解转场（与淡入淡出类似，但更平滑）"""
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """交叉溶解效果"""
         # 使用平滑的插值曲线
         smooth_progress = self._smooth_step(progress)
-        alpha = smooth_progress
-        beta = 1.0 - smooth_progress
-        return cv2.addWeighted(frame1, beta, frame2, alpha, 0)
+        return _blend(frame1, frame2, smooth_progress, out)
+    
+    def blend_weight(self, progress: float) -> Optional[float]:
+        """第二帧权重按平滑曲线变化"""
+        return self._smooth_step(progress)
+    
+    def apply_batch(self, frames1: np.ndarray, frames2: np.ndarray,
+                    progresses: np.ndarray) -> np.ndarray:
+        """整段窗口一次混合"""
+        blended = _blend_batch(frames1, frames2, self._smooth_step(np.asarray(progresses)))
+        if blended is None:
+            return super().apply_batch(frames1, frames2, progresses)
+        return blended
     
     @staticmethod
     def _smooth_step(x: float) -> float:
@@ -88,30 +264,45 @@ class SlideTransition(TransitionEffect):
         """
         super().__init__(duration)
         self.direction = direction
+        # 创建时按方向选定实现，逐帧调用时不再判断方向
+        self._apply_impl = {
+            "left": self._apply_left,
+            "right": self._apply_right,
+            "up": self._apply_up,
+            "down": self._apply_down,
+        }.get(direction, self._apply_unknown)
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """滑动效果"""
-        height, width = frame1.shape[:2]
-        result = np.zeros_like(frame1)
-        
-        if self.direction == "left":
-            offset = int(width * progress)
-            result[:, :width-offset] = frame1[:, offset:]
-            result[:, width-offset:] = frame2[:, :offset]
-        elif self.direction == "right":
-            offset = int(width * progress)
-            result[:, offset:] = frame1[:, :width-offset]
-            result[:, :offset] = frame2[:, width-offset:]
-        elif self.direction == "up":
-            offset = int(height * progress)
-            result[:height-offset, :] = frame1[offset:, :]
-            result[height-offset:, :] = frame2[:offset, :]
-        elif self.direction == "down":
-            offset = int(height * progress)
-            result[offset:, :] = frame1[:height-offset, :]
-            result[:offset, :] = frame2[height-offset:, :]
-        
-        return result
+        # 两帧的可见部分都是原帧的视图，直接拼接，无需先分配清零的结果帧
+        return self._apply_impl(frame1, frame2, progress)
+    
+    @staticmethod
+    def _apply_left(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        offset = int(frame1.shape[1] * progress)
+        return _concat(frame1[:, offset:], frame2[:, :offset], axis=1)
+    
+    @staticmethod
+    def _apply_right(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        width = frame1.shape[1]
+        offset = int(width * progress)
+        return _concat(frame2[:, width-offset:], frame1[:, :width-offset], axis=1)
+    
+    @staticmethod
+    def _apply_up(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        offset = int(frame1.shape[0] * progress)
+        return _concat(frame1[offset:, :], frame2[:offset, :], axis=0)
+    
+    @staticmethod
+    def _apply_down(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        height = frame1.shape[0]
+        offset = int(height * progress)
+        return _concat(frame2[height-offset:, :], frame1[:height-offset, :], axis=0)
+    
+    @staticmethod
+    def _apply_unknown(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        return np.zeros_like(frame1)
 
 
 class ZoomTransition(TransitionEffect):
@@ -125,28 +316,62 @@ class ZoomTransition(TransitionEffect):
         """
         super().__init__(duration)
         self.zoom_type = zoom_type
+        self._apply_impl = self._zoom_in_apply if zoom_type == "in" else self._zoom_out_apply
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """缩放效果"""
+        return self._apply_impl(frame1, frame2, progress, out)
+    
+    @classmethod
+    def _zoom_in_apply(cls, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                       out: Optional[np.ndarray]) -> np.ndarray:
+        """第一帧放大淡出，第二帧淡入"""
+        return cls._zoom_blend(frame1, frame2, 1.0 + progress * 0.5, progress, out)
+    
+    @classmethod
+    def _zoom_out_apply(cls, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                        out: Optional[np.ndarray]) -> np.ndarray:
+        """第一帧缩小淡出，第二帧淡入"""
+        return cls._zoom_blend(frame1, frame2, 1.0 - progress * 0.3, progress, out)
+    
+    @staticmethod
+    def _zoom_blend(frame1: np.ndarray, frame2: np.ndarray, scale: float, progress: float,
+                    out: Optional[np.ndarray]) -> np.ndarray:
+        """
+        以中心为基准缩放第一帧后与第二帧混合
+        :param frame1: 第一帧
+        :param frame2: 第二帧
+        :param scale: 第一帧缩放比例
+        :param progress: 进度 (0.0 到 1.0)
+        :param out: 可选的输出缓冲区
+        :return: 混合后的帧
+        """
         height, width = frame1.shape[:2]
         
-        if self.zoom_type == "in":
-            # 第一帧放大淡出，第二帧淡入
-            scale = 1.0 + progress * 0.5
-            alpha = 1.0 - progress
+        # 放大时裁剪中心区域，缩小时四周补黑边
+        # （纯缩放用resize实现，比warpAffine的逐像素反向映射快）
+        scaled_width = max(1, int(round(width * scale)))
+        scaled_height = max(1, int(round(height * scale)))
+        if scaled_width == width and scaled_height == height:
+            frame1_scaled = frame1
         else:
-            # 第一帧缩小淡出，第二帧淡入
-            scale = 1.0 - progress * 0.3
-            alpha = 1.0 - progress
-        
-        # 缩放第一帧
-        center_x, center_y = width // 2, height // 2
-        M = cv2.getRotationMatrix2D((center_x, center_y), 0, scale)
-        frame1_scaled = cv2.warpAffine(frame1, M, (width, height))
+            resized = cv2.resize(frame1, (scaled_width, scaled_height), interpolation=cv2.INTER_LINEAR)
+            if scale >= 1.0:
+                x = (scaled_width - width) // 2
+                y = (scaled_height - height) // 2
+                frame1_scaled = resized[y:y + height, x:x + width]
+            else:
+                left = (width - scaled_width) // 2
+                top = (height - scaled_height) // 2
+                frame1_scaled = cv2.copyMakeBorder(
+                    resized, top, height - scaled_height - top,
+                    left, width - scaled_width - left,
+                    cv2.BORDER_CONSTANT, value=0
+                )
         
         # 混合两帧
-        beta = progress
-        return cv2.addWeighted(frame1_scaled, alpha, frame2, beta, 0)
+        return _blend(frame1_scaled, frame2, progress, out)
 
 
 class WipeTransition(TransitionEffect):
@@ -160,27 +385,116 @@ class WipeTransition(TransitionEffect):
         """
         super().__init__(duration)
         self.direction = direction
+        self._apply_impl = {
+            "left": self._apply_left,
+            "right": self._apply_right,
+        }.get(direction, self._apply_unknown)
     
-    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+    def apply(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
         """擦除效果"""
-        height, width = frame1.shape[:2]
-        result = frame1.copy()
-        
-        if self.direction == "left":
-            split_pos = int(width * progress)
-            result[:, :split_pos] = frame2[:, :split_pos]
-        elif self.direction == "right":
-            split_pos = int(width * (1 - progress))
-            result[:, split_pos:] = frame2[:, split_pos:]
-        
-        return result
+        return self._apply_impl(frame1, frame2, progress)
+    
+    @staticmethod
+    def _apply_left(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        split_pos = int(frame1.shape[1] * progress)
+        return _concat(frame2[:, :split_pos], frame1[:, split_pos:], axis=1)
+    
+    @staticmethod
+    def _apply_right(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        split_pos = int(frame1.shape[1] * (1 - progress))
+        return _concat(frame1[:, :split_pos], frame2[:, split_pos:], axis=1)
+    
+    @staticmethod
+    def _apply_unknown(frame1: np.ndarray, frame2: np.ndarray, progress: float) -> np.ndarray:
+        return frame1.copy()
+
+
+# 读取/写入队列的最大缓存帧数
+_PIPELINE_DEPTH = 8
+
+
+def _put_frame(frames: queue.Queue, frame: Optional[np.ndarray], stop: threading.Event) -> bool:
+    """
+    放入一帧，队列满时等待，直到放入成功或收到停止信号
+    :return: 是否放入成功
+    """
+    while not stop.is_set():
+        try:
+            frames.put(frame, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_frames(cap: cv2.VideoCapture, frames: queue.Queue, stop: threading.Event) -> None:
+    """
+    读取线程：持续解码帧放入队列，读完后放入None作为结束标记
+    :param cap: 视频读取对象
+    :param frames: 帧队列
+    :param stop: 停止信号
+    """
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if not _put_frame(frames, frame, stop):
+                return
+    except Exception as e:
+        logger.error(f"读取视频帧失败: {e}")
+    finally:
+        _put_frame(frames, None, stop)
+
+
+def _write_frames(writer: cv2.VideoWriter, frames: queue.Queue, stop: threading.Event) -> None:
+    """
+    写入线程：从队列取帧编码写入，遇到None或停止信号时结束；写入出错时设置停止信号
+    :param writer: 视频写入对象
+    :param frames: 帧队列
+    :param stop: 停止信号
+    """
+    while True:
+        try:
+            frame = frames.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if frame is None:
+            return
+        try:
+            writer.write(frame)
+        except Exception as e:
+            logger.error(f"写入视频帧失败: {e}")
+            stop.set()
+            return
+
+
+def _iter_frames(frames: queue.Queue, stop: threading.Event) -> Iterator[np.ndarray]:
+    """按顺序迭代读取线程产出的帧，遇到结束标记或停止信号后停止"""
+    while True:
+        try:
+            frame = frames.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if frame is None:
+            return
+        yield frame
 
 
 class TransitionManager:
     """转场管理器"""
     
-    def __init__(self):
-        """初始化转场管理器"""
+    def __init__(self, ffmpeg_path: str = "ffmpeg"):
+        """
+        初始化转场管理器
+        :param ffmpeg_path: FFmpeg可执行文件路径（硬件编码的H.264裸流需用它封装进输出容器）
+        """
+        self.ffmpeg_path = ffmpeg_path
         self.transitions = {
             TransitionType.FADE: FadeTransition,
             TransitionType.DISSOLVE: DissolveTransition,
@@ -193,6 +507,17 @@ class TransitionManager:
             TransitionType.WIPE_LEFT: lambda d: WipeTransition(d, "left"),
             TransitionType.WIPE_RIGHT: lambda d: WipeTransition(d, "right"),
         }
+        # NVIDIA硬件编解码需在配置中显式开启且确实可用
+        self.cuda_codec = get_config().get('processing.cuda_transitions', False) and \
+            self._cuda_codec_available()
+    
+    @staticmethod
+    def _cuda_codec_available() -> bool:
+        """检查OpenCV是否编译了cudacodec且存在CUDA设备"""
+        try:
+            return hasattr(cv2, 'cudacodec') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        except (AttributeError, cv2.error):
+            return False
     
     def create_transition(self, transition_type: TransitionType, duration: float = 0.5) -> Optional[TransitionEffect]:
         """
@@ -240,53 +565,42 @@ class TransitionManager:
             width = int(cap1.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(cap1.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
-            # 创建输出视频
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-            
             # 创建转场效果
             transition = self.create_transition(transition_type, transition_duration)
             
-            # 写入第一个片段（除了最后几帧）
+            # 写入第一个片段（除了最后几帧），然后是转场和第二个片段
             transition_frames = int(fps * transition_duration)
             frame_count1 = int(cap1.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            for i in range(frame_count1 - transition_frames):
-                ret, frame = cap1.read()
-                if not ret:
-                    break
-                out.write(frame)
-            
-            # 获取转场需要的帧
-            clip1_transition_frames = []
-            for i in range(transition_frames):
-                ret, frame = cap1.read()
-                if ret:
-                    clip1_transition_frames.append(frame)
+            # 有NVIDIA GPU时优先使用硬件解码/编码，失败时回退到CPU
+            if self.cuda_codec:
+                raw_path = Path(output_path).with_suffix('.h264')
+                try:
+                    self._write_with_transition_cuda(clip1_path, clip2_path, str(raw_path),
+                                                     fps, (width, height), transition,
+                                                     frame_count1, transition_frames)
+                    # cudacodec只输出H.264裸流，复制流封装进输出容器
+                    result = run_media_command([
+                        self.ffmpeg_path, '-f', 'h264', '-framerate', str(fps),
+                        '-i', str(raw_path), '-c', 'copy', '-movflags', '+faststart',
+                        '-y', output_path
+                    ], encoding='utf-8', errors='ignore')
+                    if result.returncode != 0:
+                        raise RuntimeError(f"封装H.264裸流失败: {result.stderr[-200:]}")
+                    cap1.release()
+                    cap2.release()
+                    return True
+                except Exception as e:
+                    logger.warning(f"硬件编解码失败，改用CPU处理: {e}")
+                finally:
+                    raw_path.unlink(missing_ok=True)
             
-            clip2_transition_frames = []
-            for i in range(transition_frames):
-                ret, frame = cap2.read()
-                if ret:
-                    clip2_transition_frames.append(frame)
+            # 创建输出视频
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
             
-            # 应用转场效果
-            if transition and clip1_transition_frames and clip2_transition_frames:
-                for i in range(min(len(clip1_transition_frames), len(clip2_transition_frames))):
-                    progress = i / len(clip1_transition_frames)
-                    blended_frame = transition.apply(
-                        clip1_transition_frames[i],
-                        clip2_transition_frames[i],
-                        progress
-                    )
-                    out.write(blended_frame)
-            
-            # 写入第二个片段的剩余部分
-            while True:
-                ret, frame = cap2.read()
-                if not ret:
-                    break
-                out.write(frame)
+            self._write_with_transition(cap1, cap2, out, transition,
+                                        frame_count1, transition_frames)
             
             # 释放资源
             cap1.release()
@@ -299,6 +613,149 @@ class TransitionManager:
             logger.error(f"转场效果应用失败: {e}")
             return False
     
+    @staticmethod
+    def _write_with_transition(cap1: cv2.VideoCapture,
+                               cap2: cv2.VideoCapture,
+                               out: cv2.VideoWriter,
+                               transition: Optional[TransitionEffect],
+                               frame_count1: int,
+                               transition_frames: int) -> None:
+        """
+        流水线方式拼接两个片段：两个读取线程并行解码，写入线程负责编码，
+        主线程只负责转发和混合转场帧
+        :param cap1: 第一个片段
+        :param cap2: 第二个片段
+        :param out: 输出视频
+        :param transition: 转场效果（None表示直接拼接）
+        :param frame_count1: 第一个片段的帧数
+        :param transition_frames: 转场帧数
+        """
+        stop = threading.Event()
+        clip1_queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        clip2_queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        write_queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        readers = [
+            threading.Thread(target=_read_frames, args=(cap1, clip1_queue, stop), daemon=True),
+            threading.Thread(target=_read_frames, args=(cap2, clip2_queue, stop), daemon=True),
+        ]
+        writer = threading.Thread(target=_write_frames, args=(out, write_queue, stop), daemon=True)
+        for thread in readers + [writer]:
+            thread.start()
+        
+        def emit(frame: Optional[np.ndarray]) -> None:
+            """交给写入线程；写入线程已出错退出时抛出异常，避免主线程阻塞在满队列上"""
+            if not writer.is_alive() or not _put_frame(write_queue, frame, stop):
+                raise RuntimeError("写入线程已退出")
+        
+        try:
+            clip1 = _iter_frames(clip1_queue, stop)
+            clip2 = _iter_frames(clip2_queue, stop)
+            
+            # 写入第一个片段（除了最后几帧），第二个片段的转场帧同时在后台预读
+            for frame in islice(clip1, max(frame_count1 - transition_frames, 0)):
+                emit(frame)
+            
+            # 获取转场需要的帧
+            clip1_transition_frames = list(islice(clip1, transition_frames))
+            clip2_transition_frames = list(islice(clip2, transition_frames))
+            
+            # 应用转场效果：整段窗口一次混合，结果为独立数组，可直接交给写入线程
+            if transition and clip1_transition_frames and clip2_transition_frames:
+                count = min(len(clip1_transition_frames), len(clip2_transition_frames))
+                progresses = np.arange(count) / len(clip1_transition_frames)
+                blended_frames = transition.apply_batch(
+                    np.stack(clip1_transition_frames[:count]),
+                    np.stack(clip2_transition_frames[:count]),
+                    progresses
+                )
+                for blended_frame in blended_frames:
+                    emit(blended_frame)
+            
+            # 写入第二个片段的剩余部分
+            for frame in clip2:
+                emit(frame)
+            
+            emit(None)
+            writer.join()
+            if stop.is_set():
+                raise RuntimeError("写入视频帧失败")
+        finally:
+            # 通知读取线程退出（第一个片段的剩余帧不再需要）
+            stop.set()
+            for thread in readers + [writer]:
+                thread.join()
+    
+    @staticmethod
+    def _write_with_transition_cuda(clip1_path: str,
+                                    clip2_path: str,
+                                    output_path: str,
+                                    fps: float,
+                                    frame_size: Tuple[int, int],
+                                    transition: Optional[TransitionEffect],
+                                    frame_count1: int,
+                                    transition_frames: int) -> None:
+        """
+        使用cv2.cudacodec（NVDEC/NVENC）拼接两个片段，帧始终保留在显存中；
+        淡入淡出类转场直接在GPU上混合，其他转场下载到内存处理后再上传
+        :param clip1_path: 第一个片段路径
+        :param clip2_path: 第二个片段路径
+        :param output_path: 输出路径（H.264裸流，不带容器）
+        :param fps: 帧率
+        :param frame_size: 输出尺寸 (宽, 高)
+        :param transition: 转场效果（None表示直接拼接）
+        :param frame_count1: 第一个片段的帧数
+        :param transition_frames: 转场帧数
+        """
+        readers = []
+        for path in (clip1_path, clip2_path):
+            reader = cv2.cudacodec.createVideoReader(path)
+            reader.set(cv2.cudacodec.ColorFormat_BGR)
+            readers.append(reader)
+        writer = cv2.cudacodec.createVideoWriter(output_path, frame_size, cv2.cudacodec.H264,
+                                                 fps, cv2.cudacodec.ColorFormat_BGR)
+        
+        def gpu_frames(reader) -> Iterator:
+            while True:
+                ret, frame = reader.nextFrame()
+                if not ret:
+                    return
+                yield frame
+        
+        try:
+            clip1 = gpu_frames(readers[0])
+            clip2 = gpu_frames(readers[1])
+            
+            for frame in islice(clip1, max(frame_count1 - transition_frames, 0)):
+                writer.write(frame)
+            
+            # 解码器可能复用输出缓冲区，转场帧需要拷贝保留
+            clip1_transition_frames = [frame.clone() for frame in islice(clip1, transition_frames)]
+            clip2_transition_frames = [frame.clone() for frame in islice(clip2, transition_frames)]
+            
+            if transition and clip1_transition_frames and clip2_transition_frames:
+                upload_buffer = cv2.cuda_GpuMat()
+                for i in range(min(len(clip1_transition_frames), len(clip2_transition_frames))):
+                    progress = i / len(clip1_transition_frames)
+                    weight = transition.blend_weight(progress)
+                    if weight is not None:
+                        blended_frame = cv2.cuda.addWeighted(
+                            clip1_transition_frames[i], 1.0 - weight,
+                            clip2_transition_frames[i], weight, 0
+                        )
+                    else:
+                        upload_buffer.upload(transition.apply(
+                            clip1_transition_frames[i].download(),
+                            clip2_transition_frames[i].download(),
+                            progress
+                        ))
+                        blended_frame = upload_buffer
+                    writer.write(blended_frame)
+            
+            for frame in clip2:
+                writer.write(frame)
+        finally:
+            writer.release()
+    
     @staticmethod
     def get_available_transitions() -> list:
         """获取可用的转场类型列表"""
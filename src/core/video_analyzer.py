@@ -3,19 +3,110 @@
 分析视频的视觉特征，包括场景检测、运动检测等
 """
 
+import os
 import cv2
+import queue
+import threading
 import numpy as np
-from typing import List, Dict, Tuple
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterator
 from pathlib import Path
 from utils.logger import LoggerMixin
+from utils.config import get_config
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+# 场景检测感知哈希的位数（8x8差值哈希）
+SCENE_HASH_BITS = 64
+# 运动检测前灰度帧的缩小倍数（平均帧差对缩放不敏感）
+MOTION_DOWNSCALE = 4
+# 运动检测分段并行时每段的最少帧数（过短的视频串行处理）
+MOTION_CHUNK_MIN_FRAMES = 600
+
+
+@dataclass
+class MotionData:
+    """运动强度检测结果（SoA）：各字段为等长的NumPy数组"""
+    frames: np.ndarray      # 帧号 (int64)
+    times: np.ndarray       # 时间（秒）(float64)
+    intensity: np.ndarray   # 运动强度 0-1 (float64)
+    
+    @classmethod
+    def concatenate(cls, parts: List['MotionData']) -> 'MotionData':
+        """按顺序拼接多段结果"""
+        return cls(
+            frames=np.concatenate([p.frames for p in parts]),
+            times=np.concatenate([p.times for p in parts]),
+            intensity=np.concatenate([p.intensity for p in parts])
+        )
+    
+    def __len__(self) -> int:
+        return len(self.frames)
+    
+    def to_dicts(self) -> List[Dict]:
+        """转换为字典列表"""
+        return [
+            {'frame': int(f), 'time': float(t), 'intensity': float(i)}
+            for f, t, i in zip(self.frames, self.times, self.intensity)
+        ]
+
+
+@dataclass
+class FaceData:
+    """人脸检测结果（SoA）：各字段为等长的NumPy数组"""
+    frames: np.ndarray      # 帧号 (int64)
+    times: np.ndarray       # 时间（秒）(float64)
+    face_count: np.ndarray  # 人脸数量 (int32)
+    
+    @property
+    def has_face(self) -> np.ndarray:
+        """各采样帧是否检测到人脸"""
+        return self.face_count > 0
+    
+    def __len__(self) -> int:
+        return len(self.frames)
+    
+    def to_dicts(self) -> List[Dict]:
+        """转换为字典列表"""
+        return [
+            {'frame': int(f), 'time': float(t), 'face_count': int(c), 'has_face': bool(c > 0)}
+            for f, t, c in zip(self.frames, self.times, self.face_count)
+        ]
+
+
+def _dhash(frame: np.ndarray) -> int:
+    """
+    计算帧的64位差值哈希（dHash）
+    
+    Args:
+        frame: BGR视频帧
+        
+    Returns:
+        哈希值
+    """
+    small = cv2.cvtColor(cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA),
+                         cv2.COLOR_BGR2GRAY)
+    return int(np.packbits(small[:, 1:] > small[:, :-1]).view(np.uint64)[0])
 
 
 class VideoAnalyzer(LoggerMixin):
     """视频分析器"""
     
+    # 人脸检测器（首次使用时加载，所有实例共享）
+    _face_cascade = None
+    # CUDA人脸检测器（None表示尚未检查，False表示不可用）
+    _cuda_face_cascade = None
+    
     def __init__(self):
         """初始化视频分析器"""
         super().__init__()
+        self.config = get_config()
     
     def detect_scene_changes(self, video_path: str, threshold: float = 0.3) -> List[float]:
         """
@@ -23,7 +114,7 @@ class VideoAnalyzer(LoggerMixin):
         
         Args:
             video_path: 视频文件路径
-            threshold: 场景变化阈值（0-1）
+            threshold: 场景变化阈值（0-1，感知哈希不同位所占比例）
             
         Returns:
             场景变化时间点列表（秒）
@@ -36,32 +127,33 @@ class VideoAnalyzer(LoggerMixin):
             return scene_changes
         
         fps = cap.get(cv2.CAP_PROP_FPS)
-        prev_hist = None
+        prev_hash = None
         frame_count = 0
         
         while True:
+            # 每5帧检测一次（提高性能），非采样帧只grab不解码
+            if frame_count % 5 != 0:
+                if not cap.grab():
+                    break
+                frame_count += 1
+                continue
+            
             ret, frame = cap.read()
             if not ret:
                 break
             
-            # 每5帧检测一次（提高性能）
-            if frame_count % 5 == 0:
-                # 计算颜色直方图
-                hist = cv2.calcHist([frame], [0, 1, 2], None, [8, 8, 8], 
-                                   [0, 256, 0, 256, 0, 256])
-                hist = cv2.normalize(hist, hist).flatten()
-                
-                if prev_hist is not None:
-                    # 计算直方图相关性
-                    correlation = cv2.compareHist(prev_hist, hist, cv2.HISTCMP_CORREL)
-                    
-                    # 相关性低表示场景变化
-                    if correlation < (1 - threshold):
-                        time_seconds = frame_count / fps
-                        scene_changes.append(time_seconds)
-                        self.logger.debug(f"场景变化: {time_seconds:.2f}秒")
+            # 差值哈希：两帧哈希的汉明距离超过阈值比例表示场景变化
+            frame_hash = _dhash(frame)
+            
+            if prev_hash is not None:
+                distance = bin(prev_hash ^ frame_hash).count('1')
                 
-                prev_hist = hist
+                if distance > threshold * SCENE_HASH_BITS:
+                    time_seconds = frame_count / fps
+                    scene_changes.append(time_seconds)
+                    self.logger.debug("场景变化: %.2f秒", time_seconds)
+            
+            prev_hash = frame_hash
             
             frame_count += 1
         
@@ -70,7 +162,7 @@ class VideoAnalyzer(LoggerMixin):
         return scene_changes
     
     def detect_motion_intensity(self, video_path: str, 
-                               sample_interval: int = 5) -> List[Dict]:
+                               sample_interval: int = 5) -> MotionData:
         """
         检测视频运动强度
         
@@ -79,94 +171,292 @@ class VideoAnalyzer(LoggerMixin):
             sample_interval: 采样间隔（帧数）
             
         Returns:
-            运动强度数据列表
+            运动强度数据
         """
-        motion_data = []
-        
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             self.logger.error(f"无法打开视频: {video_path}")
-            return motion_data
+            return self._motion_data(array('q'), array('d'), 1.0)
         
         fps = cap.get(cv2.CAP_PROP_FPS)
-        prev_gray = None
-        frame_count = 0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        max_workers = self.config.get('processing.analysis_workers', min(4, os.cpu_count() or 1))
+        num_chunks = max(1, min(int(max_workers), total_frames // MOTION_CHUNK_MIN_FRAMES))
+        
+        cap.release()
+        
+        if num_chunks == 1:
+            motion_data = self._detect_motion_range(video_path, fps, 0, None, sample_interval)
+        else:
+            # 按采样间隔对齐切分时间段，每段从上一个采样帧开始读取，保证段首的帧差不丢失
+            bounds = [
+                (total_frames * k // num_chunks) // sample_interval * sample_interval
+                for k in range(num_chunks)
+            ] + [None]
             
-            if frame_count % sample_interval == 0:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                
-                if prev_gray is not None:
-                    # 计算帧差
-                    diff = cv2.absdiff(prev_gray, gray)
-                    motion_score = np.mean(diff) / 255.0
-                    
-                    motion_data.append({
-                        'frame': frame_count,
-                        'time': frame_count / fps,
-                        'intensity': motion_score
-                    })
-                
-                prev_gray = gray
+            def process_chunk(k: int) -> MotionData:
+                start_frame = max(0, bounds[k] - sample_interval)
+                return self._detect_motion_range(video_path, fps, start_frame,
+                                                 bounds[k + 1], sample_interval)
             
-            frame_count += 1
+            self.logger.info(f"分段并行运动检测 (段数: {num_chunks})")
+            with ThreadPoolExecutor(max_workers=num_chunks) as executor:
+                motion_data = MotionData.concatenate(list(executor.map(process_chunk, range(num_chunks))))
         
-        cap.release()
         self.logger.info(f"运动检测完成，{len(motion_data)} 个数据点")
         return motion_data
     
-    def detect_faces(self, video_path: str, sample_interval: int = 30) -> List[Dict]:
+    def _detect_motion_range(self, video_path: str, fps: float, start_frame: int,
+                             end_frame: Optional[int], sample_interval: int) -> MotionData:
         """
-        检测视频中的人脸
+        检测一段帧范围内的运动强度
         
         Args:
             video_path: 视频文件路径
+            fps: 帧率
+            start_frame: 起始帧（需为采样间隔的整数倍）
+            end_frame: 结束帧（不含），None表示读到视频结尾
             sample_interval: 采样间隔（帧数）
             
         Returns:
-            人脸检测结果列表
+            运动强度数据
         """
-        face_data = []
+        frames = array('q')
+        intensity = array('d')
+        prev_gray = None
+        motion_size = None
         
-        # 加载人脸检测器
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+        for frame_count, gray in self._iter_gray_frames(video_path, start_frame, end_frame, sample_interval):
+            if motion_size is None:
+                motion_size = self._motion_size(gray)
+            gray = cv2.resize(gray, motion_size, interpolation=cv2.INTER_AREA)
+            
+            if prev_gray is not None:
+                # 计算帧差
+                diff = cv2.absdiff(prev_gray, gray)
+                frames.append(frame_count)
+                intensity.append(np.mean(diff) / 255.0)
+            
+            prev_gray = gray
+        
+        return self._motion_data(frames, intensity, fps)
+    
+    def _iter_gray_frames(self, video_path: str, start_frame: int, end_frame: Optional[int],
+                          sample_interval: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        按采样间隔迭代灰度帧
+        
+        安装了PyAV时直接取解码结果的亮度平面，省去YUV转BGR再转灰度的两次整帧转换；
+        否则使用OpenCV读取，非采样帧只grab不解码。
+        
+        Args:
+            video_path: 视频文件路径
+            start_frame: 起始帧
+            end_frame: 结束帧（不含），None表示读到视频结尾
+            sample_interval: 采样间隔（帧数），按绝对帧号取模采样
+            
+        Returns:
+            (帧号, 灰度帧) 迭代器
+        """
+        if av is not None:
+            next_frame = start_frame
+            try:
+                container = av.open(video_path)
+            except Exception as e:
+                self.logger.debug("PyAV无法打开视频，使用OpenCV: %s", e)
+            else:
+                # 解码中途出错时从下一帧起改用OpenCV继续读取
+                try:
+                    with container:
+                        for frame_count, gray in self._iter_gray_frames_av(
+                                container, start_frame, end_frame, sample_interval):
+                            yield frame_count, gray
+                            next_frame = frame_count + 1
+                    return
+                except Exception as e:
+                    self.logger.warning(f"PyAV解码失败，从第{next_frame}帧起改用OpenCV: {e}")
+                    start_frame = next_frame
         
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             self.logger.error(f"无法打开视频: {video_path}")
-            return face_data
+            return
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        try:
+            if start_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            frame_count = start_frame
             
-            if frame_count % sample_interval == 0:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+            while end_frame is None or frame_count < end_frame:
+                # 非采样帧只grab不解码，避免无用的解码
+                if frame_count % sample_interval != 0:
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    continue
                 
-                face_data.append({
-                    'frame': frame_count,
-                    'time': frame_count / fps,
-                    'face_count': len(faces),
-                    'has_face': len(faces) > 0
-                })
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                yield frame_count, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                frame_count += 1
+        finally:
+            cap.release()
+    
+    @staticmethod
+    def _iter_gray_frames_av(container, start_frame: int, end_frame: Optional[int],
+                             sample_interval: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """使用PyAV解码并迭代采样帧的亮度平面，参数同_iter_gray_frames；没有视频流时抛出ValueError"""
+        if not container.streams.video:
+            raise ValueError("没有视频流")
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        fps = float(stream.average_rate or 0)
+        time_base = float(stream.time_base)
+        start_pts = stream.start_time or 0
+        
+        seeked = False
+        if start_frame > 0 and fps > 0:
+            # 跳转到起始帧之前的关键帧
+            container.seek(start_pts + int(start_frame / fps / time_base),
+                           stream=stream, backward=True)
+            seeked = True
+        
+        frame_count = -1
+        for frame in container.decode(stream):
+            # 帧号按时间戳换算，丢帧或可变帧率时仍与时间对应
+            if frame.pts is not None and fps > 0:
+                frame_count = int(round((frame.pts - start_pts) * time_base * fps))
+            elif seeked and frame_count < 0:
+                raise ValueError("跳转后的帧没有时间戳，无法确定帧号")
+            else:
+                frame_count += 1
             
-            frame_count += 1
+            if end_frame is not None and frame_count >= end_frame:
+                break
+            if frame_count >= start_frame and frame_count % sample_interval == 0:
+                yield frame_count, frame.to_ndarray(format='gray')
+    
+    @staticmethod
+    def _motion_data(frames: array, intensity: array, fps: float) -> MotionData:
+        """由采集到的帧号和强度构造运动强度数据"""
+        frames = np.array(frames, dtype=np.int64)
+        return MotionData(
+            frames=frames,
+            times=frames / fps,
+            intensity=np.array(intensity, dtype=np.float64)
+        )
+    
+    def detect_faces(self, video_path: str, sample_interval: int = 30) -> FaceData:
+        """
+        检测视频中的人脸
+        
+        Args:
+            video_path: 视频文件路径
+            sample_interval: 采样间隔（帧数）
+            
+        Returns:
+            人脸检测结果
+        """
+        frames = array('q')
+        face_counts = array('i')
+        
+        detect = self._face_detector()
         
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            self.logger.error(f"无法打开视频: {video_path}")
+            return FaceData(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int32))
+        fps = cap.get(cv2.CAP_PROP_FPS)
         cap.release()
+        
+        for frame_count, gray in self._iter_gray_frames(video_path, 0, None, sample_interval):
+            frames.append(frame_count)
+            face_counts.append(len(detect(gray)))
+        
+        frames = np.array(frames, dtype=np.int64)
+        face_data = FaceData(
+            frames=frames,
+            times=frames / fps,
+            face_count=np.array(face_counts, dtype=np.int32)
+        )
         self.logger.info(f"人脸检测完成，{len(face_data)} 个数据点")
         return face_data
     
+    @staticmethod
+    def _motion_size(frame: np.ndarray) -> Tuple[int, int]:
+        """
+        计算运动检测使用的缩小尺寸
+        
+        Args:
+            frame: 视频帧
+            
+        Returns:
+            (宽, 高)
+        """
+        height, width = frame.shape[:2]
+        return max(1, width // MOTION_DOWNSCALE), max(1, height // MOTION_DOWNSCALE)
+    
+    @classmethod
+    def _get_face_cascade(cls):
+        """
+        获取人脸检测器，首次调用时从磁盘加载
+        
+        Returns:
+            Haar级联分类器
+        """
+        if cls._face_cascade is None:
+            cls._face_cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+        return cls._face_cascade
+    
+    def _get_cuda_face_cascade(self):
+        """
+        获取CUDA人脸检测器，首次调用时检查设备并加载
+        
+        Returns:
+            CUDA级联分类器，OpenCV未编译CUDA或无可用设备时返回None
+        """
+        cls = type(self)
+        if cls._cuda_face_cascade is None:
+            cls._cuda_face_cascade = False
+            try:
+                if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                    cascade = cv2.cuda.CascadeClassifier.create(
+                        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                    )
+                    cascade.setScaleFactor(1.1)
+                    cascade.setMinNeighbors(4)
+                    cls._cuda_face_cascade = cascade
+                    self.logger.info("人脸检测使用CUDA加速")
+            except (AttributeError, cv2.error) as e:
+                self.logger.debug("CUDA人脸检测不可用，使用CPU: %s", e)
+        return cls._cuda_face_cascade or None
+    
+    def _face_detector(self):
+        """
+        获取人脸检测函数，CUDA可用时在GPU上检测，否则使用CPU级联分类器
+        
+        Returns:
+            接收灰度帧、返回人脸矩形列表的函数
+        """
+        cuda_cascade = self._get_cuda_face_cascade()
+        if cuda_cascade is not None:
+            gpu_gray = cv2.cuda_GpuMat()
+            
+            def detect_cuda(gray: np.ndarray):
+                gpu_gray.upload(gray)
+                faces = cuda_cascade.convert(cuda_cascade.detectMultiScale(gpu_gray))
+                return faces if faces is not None else ()
+            
+            return detect_cuda
+        
+        face_cascade = self._get_face_cascade()
+        return lambda gray: face_cascade.detectMultiScale(gray, 1.1, 4)
+    
     def calculate_video_score(self, video_path: str, 
                             start_time: float, 
                             end_time: float) -> float:
@@ -216,38 +506,54 @@ class VideoAnalyzer(LoggerMixin):
                 end_frame = min(end_frame, total_frames - 1)
 
             if start_frame >= end_frame:
-                self.logger.debug(f"无效的帧范围: {start_frame}-{end_frame}")
+                self.logger.debug("无效的帧范围: %d-%d", start_frame, end_frame)
                 return 0.0
 
             cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
 
-            motion_scores = []
+            sample_interval = max(1, int(fps / 10))  # 每秒0.1秒采样一次
+            # 采样数上限已知，直接预分配分数数组
+            motion_scores = np.empty((end_frame - start_frame - 1) // sample_interval + 1)
+            num_scores = 0
             prev_gray = None
+            motion_size = None
+            diff = None
             current_frame = start_frame
-            sample_interval = max(1, int(fps / 10))  # 每秒0.1秒采样一次
 
             while current_frame < end_frame:
+                # 非采样帧只grab推进位置，不解码
+                if (current_frame - start_frame) % sample_interval != 0:
+                    if not cap.grab():
+                        break
+                    current_frame += 1
+                    continue
+
                 ret, frame = cap.read()
                 if not ret:
                     break
 
-                if (current_frame - start_frame) % sample_interval == 0:
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if motion_size is None:
+                    motion_size = self._motion_size(frame)
+                gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), motion_size,
+                                  interpolation=cv2.INTER_AREA)
 
-                    if prev_gray is not None:
-                        diff = cv2.absdiff(prev_gray, gray)
-                        motion_score = np.mean(diff) / 255.0
-                        motion_scores.append(motion_score)
+                if prev_gray is not None:
+                    # 复用帧差缓冲区，cv2.mean直接归约，避免每帧分配
+                    if diff is None or diff.shape != gray.shape:
+                        diff = np.empty_like(gray)
+                    cv2.absdiff(prev_gray, gray, dst=diff)
+                    motion_scores[num_scores] = cv2.mean(diff)[0] / 255.0
+                    num_scores += 1
 
-                    prev_gray = gray
+                prev_gray = gray
 
                 current_frame += 1
 
-            if not motion_scores:
-                self.logger.debug(f"视频片段无运动数据: {start_time}-{end_time}")
+            if num_scores == 0:
+                self.logger.debug("视频片段无运动数据: %s-%s", start_time, end_time)
                 return 0.0
 
-            motion_scores = np.array(motion_scores)
+            motion_scores = motion_scores[:num_scores]
             avg_motion = np.mean(motion_scores)
             motion_variance = np.var(motion_scores)
             max_motion = np.max(motion_scores)
@@ -256,11 +562,8 @@ class VideoAnalyzer(LoggerMixin):
             normalized_variance = min(motion_variance * 20, 1.0)
             normalized_max = min(max_motion * 3, 1.0)
 
-            changes = 0
             threshold = max(0.01, avg_motion * 0.3)
-            for i in range(1, len(motion_scores)):
-                if abs(motion_scores[i] - motion_scores[i-1]) > threshold:
-                    changes += 1
+            changes = int(np.count_nonzero(np.abs(np.diff(motion_scores)) > threshold))
             change_score = min(changes / max(len(motion_scores), 1) * 2, 1.0)
 
             score = (
@@ -273,9 +576,8 @@ class VideoAnalyzer(LoggerMixin):
             final_score = min(score, 1.0)
 
             self.logger.debug(
-                f"视频分数 {start_time:.1f}-{end_time:.1f}s: "
-                f"avg={normalized_avg:.3f}, var={normalized_variance:.3f}, "
-                f"max={normalized_max:.3f}, change={change_score:.3f}, final={final_score:.3f}"
+                "视频分数 %.1f-%.1fs: avg=%.3f, var=%.3f, max=%.3f, change=%.3f, final=%.3f",
+                start_time, end_time, normalized_avg, normalized_variance, normalized_max, change_score, final_score
             )
 
             return final_score
@@ -312,18 +614,69 @@ class VideoAnalyzer(LoggerMixin):
         frame_count = 0
         saved_count = 0
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_count % frame_interval == 0:
+        # JPEG编码和写盘在后台线程进行，与解码重叠
+        # （cap.read()每次返回新数组，放入队列无需拷贝）
+        write_queue = queue.Queue(maxsize=32)
+        stop = threading.Event()
+        
+        def write_frames():
+            while True:
+                try:
+                    item = write_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        return
+                    continue
+                if item is None:
+                    return
+                path, frame = item
+                try:
+                    saved = cv2.imwrite(path, frame)
+                except cv2.error as e:
+                    self.logger.error(f"保存帧图片失败: {e}")
+                    stop.set()
+                    return
+                # 只返回确实写入成功的图片
+                if saved:
+                    frame_paths.append(path)
+                else:
+                    self.logger.warning(f"保存帧图片失败: {path}")
+        
+        writer = threading.Thread(target=write_frames, daemon=True)
+        writer.start()
+        
+        def put(item) -> bool:
+            # 写入线程退出后不再等待，避免队列满时永久阻塞
+            while not stop.is_set() and writer.is_alive():
+                try:
+                    write_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            while True:
+                # 非采样帧只grab不解码，避免无用的解码
+                if frame_count % frame_interval != 0:
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    continue
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
                 frame_path = output_path / f"frame_{saved_count:06d}.jpg"
-                cv2.imwrite(str(frame_path), frame)
-                frame_paths.append(str(frame_path))
+                if not put((str(frame_path), frame)):
+                    break
                 saved_count += 1
-            
-            frame_count += 1
+                
+                frame_count += 1
+        finally:
+            put(None)
+            writer.join()
         
         cap.release()
         self.logger.info(f"提取了 {len(frame_paths)} 帧")
@@ -3,22 +3,125 @@
 使用FFmpeg进行视频处理
 """
 
+import os
+import re
+import functools
+import bisect
 import subprocess
 import json
 import shutil
+import threading
 import time
 import tempfile
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
-from utils.logger import LoggerMixin
+from utils.logger import LoggerMixin, setup_logger
 from utils.config import get_config
 from utils.ffmpeg_pool import get_ffmpeg_pool
-from utils.command_runner import run_media_command
+from utils.command_runner import run_media_command, pipe_media_commands
+from utils.probe_cache import get_probe_cache
+
+logger = setup_logger()
+
+# ffprobe帧率格式，如 30000/1001
+_FPS_RE = re.compile(r'^(\d+)/(\d+)$')
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_executable(default_name: str, config_path: Optional[str]) -> str:
+    """
+    查找FFmpeg/FFprobe可执行文件（结果按进程缓存）
+    
+    Args:
+        default_name: 可执行文件名
+        config_path: 配置中指定的路径
+        
+    Returns:
+        可执行文件路径，找不到时返回default_name
+    """
+    # 1. 尝试配置中的路径 (如果有)
+    if config_path and Path(config_path).exists():
+        return config_path
+
+    # 2. 尝试在PATH中查找
+    found = shutil.which(default_name)
+    if found:
+        return default_name
+    
+    # 3. 尝试当前目录下的 bin 目录
+    local_bin = Path.cwd() / 'bin' / f"{default_name}.exe"
+    if local_bin.exists():
+        return str(local_bin)
+        
+    # 4. 尝试常见的安装路径
+    common_paths = [
+        r"C:\ffmpeg\bin",
+        r"C:\Program Files\ffmpeg\bin",
+        r"D:\ffmpeg\bin",
+    ]
+    
+    for path in common_paths:
+        exe_path = Path(path) / f"{default_name}.exe"
+        if exe_path.exists():
+            logger.info(f"找到FFmpeg: {exe_path}")
+            return str(exe_path)
+    
+    # 如果都找不到，返回默认值
+    return default_name
+
+
+@functools.lru_cache(maxsize=8)
+def _check_ffmpeg_version(ffmpeg_path: str) -> bool:
+    """
+    运行 ffmpeg -version 确认FFmpeg可用（成功结果按进程缓存，失败时抛出异常且不缓存）
+    
+    Args:
+        ffmpeg_path: FFmpeg可执行文件路径
+        
+    Returns:
+        True
+    """
+    run_media_command([ffmpeg_path, '-version'], timeout=10, throttle=False)
+    return True
 
 
 class VideoProcessor(LoggerMixin):
     """视频处理器"""
     
+    # 视频信息缓存（所有实例共享）：(ffprobe路径, 绝对路径, 修改时间, 大小) -> 信息字典
+    _INFO_CACHE_SIZE = 16
+    _info_cache = OrderedDict()
+    _info_cache_lock = threading.Lock()
+    
+    # 关键帧时间缓存（所有实例共享），键同上
+    _keyframe_cache = OrderedDict()
+    
+    # 片段起点距前一个关键帧不超过该值（秒）时可直接复制流，无需重新编码
+    KEYFRAME_SNAP_TOLERANCE = 0.05
+    
+    # 需要重新编码的片段数达到该值时，改用segment复用器单次解码输出所有片段
+    SEGMENT_MUXER_MIN_SEGMENTS = 3
+    # 首尾跨度与所选总时长之比超过该值时，解码间隔的开销大于逐段定位，不使用segment复用器
+    SEGMENT_MUXER_MAX_SPAN_RATIO = 1.5
+    # segment复用器输出的片段时长与预期相差超过该值（秒）时，视为切分错位
+    SEGMENT_MUXER_DURATION_TOLERANCE = 0.5
+    
+    # moov头中即包含完整流参数的容器，打开时无需预读分析数据；
+    # MKV/WebM的部分编码参数（如帧率）要靠读取数据包才能确定，仍使用默认探测
+    FAST_PROBE_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+    FAST_PROBE_ARGS = ['-probesize', '32', '-analyzeduration', '0', '-fflags', '+nobuffer']
+    
+    # 单个片段剪切的超时时间（秒）
+    SEGMENT_TIMEOUT = 300
+    
+    # 单条FFmpeg命令的最大长度（留出余量，Windows上限为32767字符）
+    MAX_COMMAND_LENGTH = 30000
+    
+    # output.video_codec 为 auto 时按此顺序探测硬件编码器
+    HW_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox')
+    _hw_encoder_cache: Dict[str, Optional[str]] = {}
+    
     def __init__(self, ffmpeg_path: str = "ffmpeg", ffprobe_path: str = "ffprobe"):
         """
         初始化视频处理器
@@ -41,40 +144,10 @@ class VideoProcessor(LoggerMixin):
     
     def _find_ffmpeg(self, default_name: str) -> str:
         """查找FFmpeg可执行文件"""
-        
-        # 1. 尝试配置中的路径 (如果有)
-        config_path = self.config.get(f'paths.{default_name}')
-        if config_path and Path(config_path).exists():
-            return config_path
-
-        # 2. 尝试在PATH中查找
-        found = shutil.which(default_name)
-        if found:
-            return default_name
-        
-        # 3. 尝试当前目录下的 bin 目录
-        local_bin = Path.cwd() / 'bin' / f"{default_name}.exe"
-        if local_bin.exists():
-            return str(local_bin)
-            
-        # 4. 尝试常见的安装路径
-        common_paths = [
-            r"C:\ffmpeg\bin",
-            r"C:\Program Files\ffmpeg\bin",
-            r"D:\ffmpeg\bin",
-        ]
-        
-        for path in common_paths:
-            exe_path = Path(path) / f"{default_name}.exe"
-            if exe_path.exists():
-                self.logger.info(f"找到FFmpeg: {exe_path}")
-                return str(exe_path)
-        
-        # 如果都找不到，返回默认值
-        return default_name
+        return _resolve_executable(default_name, self.config.get(f'paths.{default_name}'))
 
     def _check_gpu(self):
-        """检查GPU加速可用性"""
+        """检查GPU加速可用性（output.video_codec 为 auto 时自动选择硬件编码器）"""
         try:
             # 获取用户配置的编码器
             config_codec = self.config.get('output.video_codec', 'libx264')
@@ -84,6 +157,18 @@ class VideoProcessor(LoggerMixin):
                 self.encoder_name = 'libx264'
                 self.gpu_enabled = False
                 return
+            
+            if config_codec == 'auto':
+                encoder = self._detect_hw_encoder()
+                if encoder:
+                    self.encoder_name = encoder
+                    self.gpu_enabled = True
+                    self.logger.info(f"自动启用GPU加速: {self.encoder_name}")
+                else:
+                    self.logger.info("未检测到可用的硬件编码器，使用 libx264")
+                    self.encoder_name = 'libx264'
+                    self.gpu_enabled = False
+                return
 
             # 检查硬件编码器是否可用
             cmd = [self.ffmpeg_path, '-encoders']
@@ -102,9 +187,60 @@ class VideoProcessor(LoggerMixin):
             self.logger.warning(f"检查GPU失败: {e}，使用CPU编码")
             self.encoder_name = 'libx264'
             self.gpu_enabled = False
+    
+    def _detect_hw_encoder(self) -> Optional[str]:
+        """
+        按优先级探测可用的H.264硬件编码器（每个FFmpeg路径只探测一次）
+        
+        FFmpeg编译进了编码器不代表本机有对应硬件，因此对列出的编码器
+        再做一次极短的试编码确认。
+        
+        Returns:
+            编码器名称，均不可用时返回None
+        """
+        with VideoProcessor._info_cache_lock:
+            if self.ffmpeg_path in VideoProcessor._hw_encoder_cache:
+                return VideoProcessor._hw_encoder_cache[self.ffmpeg_path]
+        
+        encoder = None
+        try:
+            result = run_media_command([self.ffmpeg_path, '-hide_banner', '-encoders'],
+                                       throttle=False)
+            listed = result.stdout or ''
+            for candidate in self.HW_ENCODERS:
+                if candidate not in listed:
+                    continue
+                test_cmd = [
+                    self.ffmpeg_path, '-hide_banner', '-v', 'error',
+                    '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+                    '-frames:v', '1', '-c:v', candidate,
+                    '-f', 'null', '-'
+                ]
+                try:
+                    probe = run_media_command(test_cmd, timeout=15, throttle=False)
+                except Exception:
+                    continue
+                if probe.returncode == 0:
+                    encoder = candidate
+                    break
+        except Exception as e:
+            self.logger.debug(f"探测硬件编码器失败: {e}")
+        
+        with VideoProcessor._info_cache_lock:
+            VideoProcessor._hw_encoder_cache[self.ffmpeg_path] = encoder
+        return encoder
 
-    def _get_encoding_args(self, reencode: bool = True) -> List[str]:
-        """获取编码参数"""
+    def _get_encoding_args(self, reencode: bool = True, threads: int = 0) -> List[str]:
+        """
+        获取编码参数
+        
+        Args:
+            reencode: 是否重新编码（否则直接复制流）
+            threads: libx264编码线程数，0表示由FFmpeg按CPU核数自动决定
+            
+        Returns:
+            FFmpeg参数列表
+        """
         if not reencode:
             return ['-c', 'copy']
             
@@ -123,10 +259,14 @@ class VideoProcessor(LoggerMixin):
             # Intel QSV
             elif 'qsv' in self.encoder_name:
                 args.extend(['-global_quality', str(self.config.get('output.crf', 23))])
+            # Apple VideoToolbox（无CRF，码率由 output.bitrate 控制）
+            elif 'videotoolbox' in self.encoder_name:
+                args.extend(['-allow_sw', '1'])
         else:
             # CPU x264
             args.extend(['-preset', preset])
             args.extend(['-crf', str(self.config.get('output.crf', 23))])
+            args.extend(['-threads', str(threads or 0)])
             
         # 音频参数
         bitrate = self.config.get('output.bitrate')
@@ -152,6 +292,113 @@ class VideoProcessor(LoggerMixin):
         Returns:
             视频信息字典
         """
+        # 以修改时间和大小作为缓存键的一部分，文件变化后自动失效
+        try:
+            stat = os.stat(video_path)
+            cache_key = (self.ffprobe_path, os.path.abspath(video_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            cache_key = None
+        
+        if cache_key is not None:
+            with VideoProcessor._info_cache_lock:
+                cached = VideoProcessor._info_cache.get(cache_key)
+                if cached is not None:
+                    VideoProcessor._info_cache.move_to_end(cache_key)
+                    return dict(cached)
+        
+        # 内存未命中时查询磁盘缓存（跨进程/重启有效）
+        disk_cache = None
+        disk_key = None
+        if cache_key is not None and self.config.get('performance.cache_enabled', True) \
+                and not self._is_temp_media(cache_key[1]):
+            disk_cache = get_probe_cache()
+            disk_key = disk_cache.make_key(*cache_key[1:])
+            info = disk_cache.get(disk_key)
+        else:
+            info = None
+        
+        if info is None:
+            info = self._probe_video_info(video_path)
+            # 只缓存成功的结果
+            if info is not None and disk_cache is not None:
+                disk_cache.put(disk_key, info, cache_key[1])
+        
+        if info is not None and cache_key is not None:
+            with VideoProcessor._info_cache_lock:
+                VideoProcessor._info_cache[cache_key] = info
+                while len(VideoProcessor._info_cache) > self._INFO_CACHE_SIZE:
+                    VideoProcessor._info_cache.popitem(last=False)
+            return dict(info)
+        return info
+    
+    def _input_probe_args(self, video_path: str) -> List[str]:
+        """
+        获取读取输入文件时的探测参数
+        
+        MP4/MOV容器的流参数都在文件头中，默认预读5MB/5秒分析数据纯属浪费；
+        其他容器（如MKV、TS、AVI）仍使用FFmpeg默认值。
+        
+        Args:
+            video_path: 视频文件路径
+            
+        Returns:
+            放在 -i 之前的参数列表
+        """
+        if Path(video_path).suffix.lower() in self.FAST_PROBE_EXTENSIONS:
+            return list(self.FAST_PROBE_ARGS)
+        return []
+    
+    @staticmethod
+    def _is_temp_media(abs_path: str) -> bool:
+        """
+        判断是否为处理过程中的临时文件（片段、转场中间结果），这类文件不写入磁盘缓存
+        
+        Args:
+            abs_path: 文件绝对路径
+            
+        Returns:
+            是否为临时文件
+        """
+        if Path(abs_path).name.startswith('temp_merge_'):
+            return True
+        temp_root = os.path.abspath(tempfile.gettempdir())
+        try:
+            return os.path.commonpath([abs_path, temp_root]) == temp_root
+        except ValueError:
+            # Windows上不同盘符无法比较
+            return False
+    
+    def _probe_video_info(self, video_path: str) -> Optional[Dict]:
+        """
+        调用ffprobe读取视频信息（先用最小探测量，信息不完整时按默认探测量重试）
+        
+        Args:
+            video_path: 视频文件路径
+            
+        Returns:
+            视频信息字典，失败时返回None
+        """
+        probe_args = self._input_probe_args(video_path)
+        if probe_args:
+            info = self._run_ffprobe(video_path, probe_args)
+            if info is not None and info.get('duration') and \
+                    (info.get('audio_codec') or info.get('width')) and \
+                    ('video_codec' not in info or info.get('fps')):
+                return info
+            self.logger.debug(f"快速探测信息不完整，使用默认探测量重试: {video_path}")
+        return self._run_ffprobe(video_path, [])
+    
+    def _run_ffprobe(self, video_path: str, probe_args: List[str]) -> Optional[Dict]:
+        """
+        调用ffprobe读取视频信息
+        
+        Args:
+            video_path: 视频文件路径
+            probe_args: 放在输入文件之前的探测参数
+            
+        Returns:
+            视频信息字典，失败时返回None
+        """
         try:
             cmd = [
                 self.ffprobe_path,
@@ -159,6 +406,7 @@ class VideoProcessor(LoggerMixin):
                 '-print_format', 'json',
                 '-show_format',
                 '-show_streams',
+                *probe_args,
                 video_path
             ]
             
@@ -215,14 +463,91 @@ class VideoProcessor(LoggerMixin):
             self.logger.error(f"获取视频信息失败: {e}")
             return None
     
+    def _keyframe_times(self, video_path: str) -> Optional[List[float]]:
+        """
+        获取视频流所有关键帧的时间（只解复用，不解码）
+        
+        Args:
+            video_path: 视频文件路径
+            
+        Returns:
+            升序的关键帧时间列表（秒），失败时返回None
+        """
+        try:
+            stat = os.stat(video_path)
+            cache_key = (self.ffprobe_path, os.path.abspath(video_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            cache_key = None
+        
+        if cache_key is not None:
+            with VideoProcessor._info_cache_lock:
+                cached = VideoProcessor._keyframe_cache.get(cache_key)
+                if cached is not None:
+                    VideoProcessor._keyframe_cache.move_to_end(cache_key)
+                    return cached
+        
+        try:
+            cmd = [
+                self.ffprobe_path,
+                '-v', 'quiet',
+                '-select_streams', 'v:0',
+                '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=print_section=0',
+                video_path
+            ]
+            result = run_media_command(cmd, encoding='utf-8', errors='ignore',
+                                       check=True, throttle=False)
+        except Exception as e:
+            self.logger.warning(f"读取关键帧失败: {e}")
+            return None
+        
+        keyframes = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                keyframes.append(float(pts_time))
+        keyframes.sort()
+        
+        if cache_key is not None:
+            with VideoProcessor._info_cache_lock:
+                VideoProcessor._keyframe_cache[cache_key] = keyframes
+                while len(VideoProcessor._keyframe_cache) > self._INFO_CACHE_SIZE:
+                    VideoProcessor._keyframe_cache.popitem(last=False)
+        return keyframes
+    
+    def _snap_to_keyframes(self, video_path: str,
+                           segments: List[Tuple[float, float]]) -> Optional[List[float]]:
+        """
+        将各片段起点对齐到不晚于它的关键帧
+        
+        Args:
+            video_path: 视频文件路径
+            segments: 时间段列表
+            
+        Returns:
+            对齐后的起点列表；任一片段与关键帧的距离超过容差时返回None
+        """
+        keyframes = self._keyframe_times(video_path)
+        if not keyframes:
+            return None
+        
+        snapped = []
+        for start, _ in segments:
+            pos = bisect.bisect_right(keyframes, start + 1e-6)
+            if pos == 0 or start - keyframes[pos - 1] > self.KEYFRAME_SNAP_TOLERANCE:
+                return None
+            snapped.append(max(0.0, keyframes[pos - 1]))
+        return snapped
+    
     def _parse_fps(self, fps_str: str) -> float:
         """解析帧率字符串"""
+        match = _FPS_RE.match(fps_str) if isinstance(fps_str, str) else None
+        if match:
+            den = int(match.group(2))
+            return int(match.group(1)) / den if den else 0.0
         try:
-            if '/' in fps_str:
-                num, den = fps_str.split('/')
-                return float(num) / float(den)
             return float(fps_str)
-        except:
+        except (TypeError, ValueError):
             return 0.0
     
     def extract_audio(self, video_path: str, output_path: str) -> bool:
@@ -252,6 +577,7 @@ class VideoProcessor(LoggerMixin):
             
             cmd = [
                 self.ffmpeg_path,
+                *self._input_probe_args(video_path),
                 '-i', video_path,
                 '-vn',  # 不包含视频
                 '-acodec', 'pcm_s16le',  # PCM格式
@@ -314,74 +640,66 @@ class VideoProcessor(LoggerMixin):
         try:
             # 验证FFmpeg可用性
             try:
-                run_media_command([self.ffmpeg_path, '-version'], timeout=10, throttle=False)
+                _check_ffmpeg_version(self.ffmpeg_path)
             except Exception as e:
                 raise Exception(f"FFmpeg检查失败: {e}")
             
+            transition_enabled = self.config.get('processing.transition_enabled', False) and apply_transition
+            use_transition = transition_enabled and len(segments) > 1
+            
+            # 所有片段起点都落在关键帧上时可直接复制流，跳过解码和编码；
+            # 只要有一个片段需要重新编码就全部重新编码，保证合并时各片段编码参数一致
+            snapped_starts = None
+            if self.config.get('processing.stream_copy_cuts', True):
+                snapped_starts = self._snap_to_keyframes(video_path, segments)
+            
+            if not use_transition:
+                # 不需要转场时：能流复制就经管道直接复制合并，否则在一个FFmpeg进程内重新编码完成剪切和合并
+                if snapped_starts is not None:
+                    self.logger.info("片段起点均与关键帧对齐，使用流复制剪切")
+                    if self._cut_and_concat_piped(video_path, segments, snapped_starts, output_path):
+                        self.logger.info(f"视频剪辑完成: {output_path}")
+                        return True
+                    self.logger.warning("流复制剪切合并失败，改用重新编码")
+                if self._cut_single_pass(video_path, output_path, segments):
+                    self.logger.info(f"视频剪辑完成: {output_path}")
+                    return True
+                # 备用路径：单进程命令失败（如片段过多）时逐段编码为MPEG-TS，再按字节拼接
+                self.logger.warning("单进程剪切合并失败，改用分段处理")
+                snapped_starts = None
+            
+            stream_copy = snapped_starts is not None
             self.logger.info(f"开始剪切 {len(segments)} 个片段 (并行处理)")
             
             # 创建临时目录
             temp_dir = Path(tempfile.mkdtemp(prefix="smartcut_segments_"))
             self.logger.info(f"临时目录已创建: {temp_dir}")
             
-            # 准备任务参数
-            tasks = []
-            for i, (start, end) in enumerate(segments):
-                task_args = {
-                    'index': i,
-                    'start': start,
-                    'end': end,
-                    'video_path': video_path,
-                    'temp_dir': temp_dir,
-                    'ffmpeg_path': self.ffmpeg_path
-                }
-                tasks.append(task_args)
-            
-            # 获取并行配置
-            max_workers = self.config.get('processing.max_segment_workers', 2)
-            max_workers = max(1, int(max_workers))
-            pool = get_ffmpeg_pool(max_workers=max_workers)
-            
-            # 并行执行任务
-            self.logger.info(f"提交 {len(tasks)} 个剪切任务 (并发数: {max_workers})")
-            results = pool.map_tasks(self._cut_segment_task, tasks)
-            
-            # 处理结果
-            segment_files = []
-            failed_segments = []
-            
-            for res in results:
-                if res and res.get('success'):
-                    segment_files.append(res['file_path'])
-                else:
-                    if res:
-                        failed_segments.append(res)
-                    else:
-                        failed_segments.append({'error': 'Unknown error'})
-            
-            # 检查结果
-            if not segment_files:
-                raise Exception(f"所有片段都剪切失败 (失败数: {len(failed_segments)})")
+            # 转场需要MP4片段；备用路径的片段输出为MPEG-TS，合并时可直接按字节拼接
+            container = 'mp4' if use_transition else 'ts'
             
-            if failed_segments:
-                self.logger.warning(f"有 {len(failed_segments)} 个片段失败，但有 {len(segment_files)} 个成功，继续合并")
-                
-            # 按索引排序确保顺序正确 (虽然map_tasks通常保持顺序，但为了安全起见)
-            segment_files.sort(key=lambda p: int(p.stem.split('_')[-1]))
+            # 片段较多且需要重新编码时，只解码一遍源文件，由segment复用器输出各片段
+            segment_files = None
+            if not stream_copy and len(segments) >= self.SEGMENT_MUXER_MIN_SEGMENTS:
+                segment_files = self._cut_with_segment_muxer(video_path, segments, temp_dir, container)
+            if segment_files is None:
+                segment_files = self._cut_segments_parallel(
+                    video_path, segments, snapped_starts, temp_dir, container
+                )
             
             # 合并片段
             self.logger.info(f"开始合并 {len(segment_files)} 个片段...")
 
             # 检查是否启用转场效果
-            transition_enabled = self.config.get('processing.transition_enabled', False) and apply_transition
             transition_type = self.config.get('processing.transition_type', 'fade')
             transition_duration = self.config.get('processing.transition_duration', 0.5)
 
-            if transition_enabled and len(segment_files) > 1:
+            if use_transition and len(segment_files) > 1:
                 self.logger.info(f"应用转场效果: {transition_type}, 时长: {transition_duration}秒")
                 succ = self._concat_with_transition(segment_files, output_path, transition_type, transition_duration)
             else:
-                succ = self._concat_videos(segment_files, output_path, reencode=True) # 使用reencode以确保衔接平滑和应用统一编码
+                # 备用路径的片段已按输出参数编码，直接复制合并
+                succ = self._concat_videos(segment_files, output_path)
             
             if succ:
                 self.logger.info(f"视频剪辑完成: {output_path}")
@@ -396,18 +714,336 @@ class VideoProcessor(LoggerMixin):
             # 清理临时文件
             if temp_dir and temp_dir.exists():
                 try:
-                    # 在Windows上可能需要稍等一下让文件句柄释放
-                    time.sleep(0.5)
+                    # FFmpeg进程已退出，句柄已释放；杀毒软件等占用文件时可配置等待时间
+                    settle_ms = self.config.get('processing.fs_settle_ms', 0)
+                    if settle_ms:
+                        time.sleep(settle_ms / 1000)
                     shutil.rmtree(temp_dir, ignore_errors=True)
                 except Exception as cleanup_error:
                     self.logger.warning(f"清理临时文件失败: {cleanup_error}")
 
+    def _cut_with_segment_muxer(self, video_path: str, segments: List[Tuple[float, float]],
+                                temp_dir: Path, container: str) -> Optional[List[Path]]:
+        """
+        用segment复用器在一次解码中输出所有片段
+        
+        从第一个片段起点定位，select/aselect滤镜只保留片段内的帧（间隔不编码），
+        再按各片段累计时长切分输出；切分点处强制插入关键帧，保证切分精确。
+        片段间隔过大时解码间隔的开销超过逐段定位，此时不使用该方式。
+        
+        Args:
+            video_path: 输入视频路径
+            segments: 时间段列表
+            temp_dir: 片段输出目录
+            container: 片段容器格式（mp4或ts）
+            
+        Returns:
+            按顺序排列的片段文件列表；片段重叠、乱序、间隔过大或FFmpeg失败时返回None，由调用方回退
+        """
+        segments = [(start, end) for start, end in segments if end - start >= 0.1]
+        if len(segments) < 2:
+            return None
+        if any(start < prev_end for (_, prev_end), (start, _) in zip(segments, segments[1:])):
+            return None
+        
+        origin = segments[0][0]
+        span = segments[-1][1] - origin
+        selected = sum(end - start for start, end in segments)
+        if span > selected * self.SEGMENT_MUXER_MAX_SPAN_RATIO:
+            return None
+        
+        video_info = self.get_video_info(video_path)
+        if not video_info or not video_info.get('video_codec'):
+            return None
+        has_audio = bool(video_info.get('audio_codec'))
+        
+        # 定位后时间从0开始，条件与切分点都相对第一个片段起点；
+        # 相邻片段共享的边界帧会同时满足两个between，用gt(...,0)归一
+        condition = 'gt(' + '+'.join(
+            f"between(t,{start - origin:.3f},{end - origin:.3f})" for start, end in segments
+        ) + ',0)'
+        boundaries = []
+        elapsed = 0.0
+        for start, end in segments[:-1]:
+            elapsed += end - start
+            boundaries.append(f"{elapsed:.3f}")
+        times = ','.join(boundaries)
+        
+        graph = f"[0:v]select='{condition}',setpts=N/FRAME_RATE/TB[outv]"
+        maps = ['-map', '[outv]']
+        if has_audio:
+            graph += f";[0:a]aselect='{condition}',asetpts=N/SR/TB[outa]"
+            maps.extend(['-map', '[outa]'])
+        
+        pattern = temp_dir / f"part_%04d.{container}"
+        cmd = [
+            self.ffmpeg_path,
+            '-ss', f"{origin:.3f}",
+            *self._input_probe_args(video_path),
+            '-i', video_path,
+            '-t', f"{span:.3f}",
+            '-filter_complex', graph,
+            *maps,
+        ]
+        cmd.extend(self._get_encoding_args(reencode=True))
+        cmd.extend([
+            '-force_key_frames', times,
+            '-f', 'segment',
+            '-segment_times', times,
+            '-reset_timestamps', '1',
+        ])
+        # 中间片段不需要faststart（会多一遍重写文件）
+        if container == 'ts':
+            cmd.extend(['-segment_format', 'mpegts'])
+        cmd.extend(['-y', str(pattern)])
+        
+        if sum(len(arg) + 1 for arg in cmd) > self.MAX_COMMAND_LENGTH:
+            return None
+        
+        self.logger.info(f"单次解码切分 {len(segments)} 个片段")
+        result = run_media_command(cmd, encoding='utf-8', errors='ignore')
+        parts = sorted(temp_dir.glob(f"part_*.{container}"))
+        if result.returncode != 0 or len(parts) != len(segments):
+            self.logger.warning(f"单次解码切分失败，改用逐段剪切: {result.stderr[-200:]}")
+            for part in parts:
+                part.unlink(missing_ok=True)
+            return None
+        
+        # 切分点落在关键帧附近时复用器可能提前或延后切分，逐个核对片段时长
+        for part, (start, end) in zip(parts, segments):
+            part_info = self.get_video_info(str(part))
+            duration = part_info.get('duration', 0) if part_info else 0
+            if abs(duration - (end - start)) > self.SEGMENT_MUXER_DURATION_TOLERANCE:
+                self.logger.warning(
+                    f"单次解码切分的片段时长不符（{duration:.2f}秒，应为{end - start:.2f}秒），改用逐段剪切"
+                )
+                for leftover in parts:
+                    leftover.unlink(missing_ok=True)
+                return None
+        
+        segment_files = []
+        for i, part in enumerate(parts):
+            target = temp_dir / f"segment_{i:04d}.{container}"
+            os.replace(part, target)
+            segment_files.append(target)
+        return segment_files
+    
+    def _cut_segments_parallel(self, video_path: str, segments: List[Tuple[float, float]],
+                               snapped_starts: Optional[List[float]], temp_dir: Path,
+                               container: str) -> List[Path]:
+        """
+        每个片段一个FFmpeg进程并行剪切
+        
+        Args:
+            video_path: 输入视频路径
+            segments: 时间段列表
+            snapped_starts: 对齐到关键帧的起点（不为None时直接复制流）
+            temp_dir: 片段输出目录
+            container: 片段容器格式（mp4或ts）
+            
+        Returns:
+            按顺序排列的片段文件列表
+        """
+        stream_copy = snapped_starts is not None
+        
+        # 获取并行配置
+        max_workers = self.config.get('processing.max_segment_workers', 2)
+        max_workers = max(1, int(max_workers))
+        # 每个FFmpeg进程的编码线程数，使并行片段数×线程数约等于CPU核数
+        encode_threads = max(1, (os.cpu_count() or 1) // min(max_workers, len(segments)))
+        
+        # 准备任务参数
+        tasks = []
+        for i, (start, end) in enumerate(segments):
+            task_args = {
+                'index': i,
+                'start': snapped_starts[i] if stream_copy else start,
+                'end': end,
+                'video_path': video_path,
+                'temp_dir': temp_dir,
+                'ffmpeg_path': self.ffmpeg_path,
+                'stream_copy': stream_copy,
+                'threads': encode_threads,
+                'container': container
+            }
+            tasks.append(task_args)
+        
+        pool = get_ffmpeg_pool(max_workers=max_workers)
+        
+        # 并行执行任务
+        self.logger.info(f"提交 {len(tasks)} 个剪切任务 (并发数: {max_workers})")
+        results = pool.map_tasks(self._cut_segment_task, tasks)
+        
+        # 处理结果
+        segment_files = []
+        failed_segments = []
+        
+        for res in results:
+            if res and res.get('success'):
+                segment_files.append(res['file_path'])
+            else:
+                if res:
+                    failed_segments.append(res)
+                else:
+                    failed_segments.append({'error': 'Unknown error'})
+        
+        # 检查结果
+        if not segment_files:
+            raise Exception(f"所有片段都剪切失败 (失败数: {len(failed_segments)})")
+        
+        if failed_segments:
+            self.logger.warning(f"有 {len(failed_segments)} 个片段失败，但有 {len(segment_files)} 个成功，继续合并")
+            
+        # 按索引排序确保顺序正确 (虽然map_tasks通常保持顺序，但为了安全起见)
+        segment_files.sort(key=lambda p: int(p.stem.split('_')[-1]))
+        return segment_files
+    
+    def _cut_single_pass(self, video_path: str, output_path: str,
+                         segments: List[Tuple[float, float]]) -> bool:
+        """
+        用一条FFmpeg命令完成所有片段的剪切与合并
+        
+        每个片段作为一路带-ss/-t的输入（输入端快速定位，只解码需要的部分），
+        再由concat滤镜拼接，编码器只初始化一次，也不产生中间文件。
+        
+        Args:
+            video_path: 输入视频路径
+            output_path: 输出视频路径
+            segments: 时间段列表
+            
+        Returns:
+            是否成功（命令过长或FFmpeg失败时返回False，由调用方回退到分段处理）
+        """
+        segments = [(start, end) for start, end in segments if end - start >= 0.1]
+        if not segments:
+            return False
+        
+        video_info = self.get_video_info(video_path)
+        if not video_info or not video_info.get('video_codec'):
+            return False
+        has_audio = bool(video_info.get('audio_codec'))
+        
+        cmd = [self.ffmpeg_path]
+        probe_args = self._input_probe_args(video_path)
+        for start, end in segments:
+            cmd.extend(['-ss', f"{start:.3f}", '-t', f"{end - start:.3f}", *probe_args, '-i', video_path])
+        
+        streams = ''.join(
+            f"[{i}:v][{i}:a]" if has_audio else f"[{i}:v]" for i in range(len(segments))
+        )
+        if has_audio:
+            graph = f"{streams}concat=n={len(segments)}:v=1:a=1[outv][outa]"
+            cmd.extend(['-filter_complex', graph, '-map', '[outv]', '-map', '[outa]'])
+        else:
+            graph = f"{streams}concat=n={len(segments)}:v=1:a=0[outv]"
+            cmd.extend(['-filter_complex', graph, '-map', '[outv]'])
+        
+        cmd.extend(self._get_encoding_args(reencode=True))
+        cmd.extend(['-movflags', '+faststart', '-y', output_path])
+        
+        # Windows命令行长度上限为32767字符
+        if sum(len(arg) + 1 for arg in cmd) > self.MAX_COMMAND_LENGTH:
+            self.logger.info("片段过多，命令行超长，改用分段处理")
+            return False
+        
+        self.logger.info(f"单进程剪切合并 {len(segments)} 个片段")
+        result = run_media_command(cmd, encoding='utf-8', errors='ignore')
+        if result.returncode != 0:
+            self.logger.warning(f"单进程剪切合并失败: {result.stderr[-200:]}")
+            return False
+        
+        output = Path(output_path)
+        return output.exists() and output.stat().st_size > 0
+    
+    def _segment_command(self, ffmpeg_path: str, video_path: str, start: float, end: float,
+                         stream_copy: bool, threads: int, container: str, output: str) -> List[str]:
+        """
+        构建单个片段的剪切命令
+        
+        Args:
+            ffmpeg_path: FFmpeg可执行文件路径
+            video_path: 输入视频路径
+            start: 开始时间（秒）
+            end: 结束时间（秒）
+            stream_copy: 是否直接复制流（起点在关键帧上时）
+            threads: 编码线程数
+            container: 片段容器格式（mp4或ts）
+            output: 输出文件路径（或 pipe:1）
+            
+        Returns:
+            FFmpeg命令
+        """
+        cmd = [
+            ffmpeg_path,
+            '-ss', f"{start:.3f}",
+            *self._input_probe_args(video_path),
+            '-i', video_path,
+            '-t', f"{end - start:.3f}",
+        ]
+        cmd.extend(self._get_encoding_args(reencode=not stream_copy, threads=threads))
+        
+        # 中间片段不需要faststart（会多一遍重写文件），最终输出时再设置
+        if container == 'ts':
+            cmd.extend(['-f', 'mpegts'])
+        cmd.extend([
+            '-avoid_negative_ts', 'make_zero',
+            '-y',
+            output
+        ])
+        return cmd
+    
+    def _cut_and_concat_piped(self, video_path: str, segments: List[Tuple[float, float]],
+                              snapped_starts: Optional[List[float]], output_path: str) -> bool:
+        """
+        流复制的各片段以MPEG-TS输出到标准输出，依次写入合并进程的标准输入，不产生中间文件
+        
+        所有片段来自同一源文件、编码参数一致，合并进程同样直接复制流，全程不解码不编码
+        
+        Args:
+            video_path: 输入视频路径
+            segments: 时间段列表
+            snapped_starts: 对齐到关键帧的起点（为None时无法流复制，直接返回False）
+            output_path: 输出视频路径
+            
+        Returns:
+            是否成功（失败时由调用方改用重新编码的方式）
+        """
+        if snapped_starts is None:
+            return False
+        producers = []
+        for (start, end), snapped in zip(segments, snapped_starts):
+            if end - snapped < 0.1:
+                continue
+            producers.append(self._segment_command(
+                self.ffmpeg_path, video_path, snapped, end, True, 0, 'ts', 'pipe:1'
+            ))
+        if not producers:
+            return False
+        
+        consumer = [self.ffmpeg_path, '-f', 'mpegts', '-i', 'pipe:0',
+                    '-c', 'copy', '-bsf:a', 'aac_adtstoasc',
+                    '-movflags', '+faststart', '-y', output_path]
+        
+        self.logger.info(f"管道剪切合并 {len(producers)} 个片段")
+        # 每个片段沿用逐段剪切的超时，整条管道另留一份时间给合并进程收尾
+        result = pipe_media_commands(
+            producers, consumer,
+            timeout=self.SEGMENT_TIMEOUT,
+            total_timeout=self.SEGMENT_TIMEOUT * (len(producers) + 1)
+        )
+        if result.returncode != 0:
+            self.logger.warning(f"管道剪切合并失败: {result.stderr[-200:]}")
+            return False
+        
+        output = Path(output_path)
+        return output.exists() and output.stat().st_size > 0
+    
     def _cut_segment_task(self, args: Dict) -> Dict:
         """
         单个片段剪切任务 (用于并行执行)
         
         Args:
-            args: 包含 index, start, end, video_path, temp_dir, ffmpeg_path 的字典
+            args: 包含 index, start, end, video_path, temp_dir, ffmpeg_path, stream_copy, threads, container 的字典
             
         Returns:
             结果字典
@@ -424,28 +1060,13 @@ class VideoProcessor(LoggerMixin):
             if duration < 0.1:
                 return {'success': False, 'error': 'Duration too short', 'index': index}
                 
-            output_file = temp_dir / f"segment_{index:04d}.mp4"
+            container = args.get('container', 'mp4')
+            output_file = temp_dir / f"segment_{index:04d}.{container}"
             
-            # 构建命令
-            # 使用快速剪切重新编码模式
             # 注意: 这里虽然是多线程，但每个FFmpeg进程是独立的
-            cmd = [
-                ffmpeg_path,
-                '-ss', f"{start:.3f}",
-                '-i', video_path,
-                '-t', f"{duration:.3f}",
-            ]
-            
-            # 获取编码参数
-            encoding_args = self._get_encoding_args(reencode=True)
-            cmd.extend(encoding_args)
-            
-            cmd.extend([
-                '-movflags', '+faststart',
-                '-avoid_negative_ts', 'make_zero',
-                '-y',
-                str(output_file)
-            ])
+            cmd = self._segment_command(ffmpeg_path, video_path, start, end,
+                                        args.get('stream_copy', False), args.get('threads', 0),
+                                        container, str(output_file))
             
             # 执行命令
             # 每个子进程不需要太长的超时，因为片段通常较短
@@ -453,7 +1074,7 @@ class VideoProcessor(LoggerMixin):
                 cmd,
                 encoding='utf-8',
                 errors='replace',
-                timeout=300
+                timeout=self.SEGMENT_TIMEOUT
             )
             
             if result.returncode != 0:
@@ -606,7 +1227,8 @@ class VideoProcessor(LoggerMixin):
 
             # 最后一个临时文件就是最终输出
             if temp_outputs:
-                shutil.move(str(temp_outputs[-1]), output_path)
+                # 临时文件与输出在同一目录，直接原子替换
+                os.replace(str(temp_outputs[-1]), output_path)
                 # 清理所有临时文件
                 for temp_file in temp_outputs[:-1]:
                     try:
@@ -616,7 +1238,7 @@ class VideoProcessor(LoggerMixin):
             else:
                 # 只有两个视频，current_input已经是最终输出
                 if current_input != str(video_files[0]):
-                    shutil.move(current_input, output_path)
+                    os.replace(current_input, output_path)
 
             self.logger.info(f"转场合并完成: {output_path}")
             return True
@@ -648,6 +1270,34 @@ class VideoProcessor(LoggerMixin):
                     self.logger.error(f"视频文件为空: {video_file}")
                     return False
             
+            # MPEG-TS可直接按字节拼接，省去concat列表和分离器逐个解析片段
+            if all(video_file.suffix.lower() == '.ts' for video_file in video_files):
+                with tempfile.NamedTemporaryFile(
+                    mode='wb',
+                    suffix='.ts',
+                    prefix='concat_',
+                    dir=Path(output_path).parent,
+                    delete=False
+                ) as joined:
+                    concat_file = Path(joined.name)
+                    for video_file in video_files:
+                        with open(video_file, 'rb') as src:
+                            shutil.copyfileobj(src, joined, 1024 * 1024)
+                
+                cmd = [self.ffmpeg_path, '-i', str(concat_file)]
+                if reencode:
+                    cmd.extend(self._get_encoding_args(reencode=True))
+                else:
+                    # ADTS格式的AAC放入MP4前需要转换
+                    cmd.extend(['-c', 'copy', '-bsf:a', 'aac_adtstoasc'])
+                cmd.extend(['-movflags', '+faststart', '-y', output_path])
+                
+                result = run_media_command(cmd, encoding='utf-8', errors='ignore')
+                if result.returncode != 0:
+                    self.logger.error(f"视频合并失败: {result.stderr}")
+                    return False
+                return True
+            
             # 创建唯一的concat列表文件，避免并发冲突
             with tempfile.NamedTemporaryFile(
                 mode='w',
@@ -711,7 +1361,7 @@ class VideoProcessor(LoggerMixin):
             self.logger.error(f"视频合并异常: {e}")
             return False
         finally:
-            # 清理concat列表文件
+            # 清理concat列表文件（或拼接后的TS文件）
             if concat_file and concat_file.exists():
                 try:
                     concat_file.unlink()
@@ -460,16 +460,13 @@ class VideoProcessingWorkflow(LoggerMixin):
             # 生成TTS音频输出路径
             tts_audio_path = str(Path(output_video_path).parent / f"tts_audio_{uuid.uuid4().hex}.wav")
 
-            # 从字幕片段生成配音
-            full_text = " ".join([seg.get('text', '') for seg in subtitle_segments if seg.get('text')])
-
-            if not full_text:
+            if not any(seg.get('text', '').strip() for seg in subtitle_segments):
                 self.logger.warning("没有有效的文本内容用于TTS")
                 return None
 
-            # 生成语音
+            # 逐段配音并按字幕时间轴拼接，配音与画面同步
             with self.ai_lock:
-                tts_success = self.tts_engine.synthesize(full_text, tts_audio_path)
+                tts_success = self.tts_engine.synthesize_concatenated(subtitle_segments, tts_audio_path)
 
             if tts_success:
                 self.logger.info(f"TTS配音生成成功: {tts_audio_path}")
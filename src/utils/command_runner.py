@@ -5,6 +5,7 @@ Keeps heavy media commands globally throttled and cancellable so batch-level
 and segment-level parallelism do not multiply into too many FFmpeg processes.
 """
 
+import shutil
 import subprocess
 import threading
 from typing import List, Optional
@@ -97,6 +98,134 @@ def run_media_command(
             semaphore.release()
 
 
+def _drain(stream, chunks: list):
+    """Read a binary stream to EOF in the background so the child never blocks on it."""
+    for chunk in iter(lambda: stream.read(65536), b""):
+        chunks.append(chunk)
+    stream.close()
+
+
+def pipe_media_commands(
+    producers: List[List[str]],
+    consumer: List[str],
+    *,
+    timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    chunk_size: int = 1 << 20,
+    throttle: bool = True,
+):
+    """
+    Stream the stdout of each producer, in order, into the stdin of one consumer.
+
+    Producers run one after another (each overlaps with the consumer), so the
+    whole pipeline counts as a single job against the media-job throttle and
+    no intermediate files touch the disk. Returns a CompletedProcess for the
+    consumer; if a producer fails, its return code and stderr are reported and
+    the consumer is stopped. When a producer runs longer than ``timeout`` or
+    the whole pipeline longer than ``total_timeout``, every process is killed
+    and the return code is -9, as in run_media_command.
+    """
+    # The N producers and the consumer share one throttle slot: producers are
+    # started sequentially, so at most two processes (one producer plus the
+    # consumer) are alive at once, and stream-copy producers barely use CPU.
+    semaphore = _get_semaphore() if throttle else None
+    if semaphore:
+        semaphore.acquire()
+
+    procs = []
+    timers = []
+    expired = []
+
+    def start(cmd, **kwargs):
+        proc = subprocess.Popen(cmd, stderr=subprocess.PIPE,
+                                creationflags=CREATE_NO_WINDOW, **kwargs)
+        procs.append(proc)
+        with _state_lock:
+            _active_processes.add(proc)
+        return proc
+
+    def expire(cmd, seconds):
+        expired.append((cmd, seconds))
+        for proc in list(procs):
+            try:
+                if proc.poll() is None:
+                    proc.kill()
+            except OSError:
+                pass
+
+    def arm(seconds, cmd):
+        timer = threading.Timer(seconds, expire, args=(cmd, seconds))
+        timer.daemon = True
+        timer.start()
+        timers.append(timer)
+        return timer
+
+    try:
+        sink = start(consumer, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        sink_err = []
+        sink_drain = threading.Thread(target=_drain, args=(sink.stderr, sink_err), daemon=True)
+        sink_drain.start()
+        if total_timeout:
+            arm(total_timeout, consumer)
+
+        failure = None
+        for cmd in producers:
+            if expired:
+                break
+            source = start(cmd, stdout=subprocess.PIPE)
+            source_timer = arm(timeout, cmd) if timeout else None
+            source_err = []
+            source_drain = threading.Thread(target=_drain, args=(source.stderr, source_err), daemon=True)
+            source_drain.start()
+            try:
+                shutil.copyfileobj(source.stdout, sink.stdin, chunk_size)
+            except (BrokenPipeError, OSError):
+                source.kill()
+            source.stdout.close()
+            source.wait()
+            source_drain.join()
+            if source_timer:
+                source_timer.cancel()
+            if expired or sink.poll() is not None:
+                # timed out, or consumer exited early; reported below
+                break
+            if source.returncode != 0:
+                failure = subprocess.CompletedProcess(
+                    cmd, source.returncode or -1, "",
+                    b"".join(source_err).decode("utf-8", "ignore"),
+                )
+                break
+
+        if failure is not None:
+            sink.kill()
+        try:
+            sink.stdin.close()
+        except OSError:
+            pass
+        sink.wait()
+        sink_drain.join()
+        if expired:
+            cmd, seconds = expired[0]
+            logger.warning(f"媒体管道超时（{seconds}秒），已终止: {cmd[0]}")
+            return subprocess.CompletedProcess(cmd, -9, "", f"timed out after {seconds}s")
+        if failure is not None:
+            return failure
+        return subprocess.CompletedProcess(
+            consumer, sink.returncode, "", b"".join(sink_err).decode("utf-8", "ignore")
+        )
+    finally:
+        for timer in timers:
+            timer.cancel()
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            with _state_lock:
+                _active_processes.discard(proc)
+        if semaphore:
+            semaphore.release()
+
+
 def cancel_active_media_commands():
     """Terminate all currently running registered media commands."""
     with _state_lock:
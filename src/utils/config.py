@@ -47,7 +47,7 @@ class Config:
             "format": "mp4",
             "resolution": "1080p",
             "fps": 30,
-            "video_codec": "libx264",
+            "video_codec": "auto",  # auto: 自动选择可用的硬件编码器
             "audio_codec": "aac",
             "bitrate": "5000k",
             "preset": "medium",
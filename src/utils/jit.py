@@ -0,0 +1,78 @@
+"""
+JIT编译辅助
+numba可用时对数值内核即时编译，未安装或编译失败时使用原始Python实现
+"""
+
+import functools
+from typing import Callable
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# numba是否可用（首次调用被装饰函数时才导入）
+_numba = None
+_numba_checked = False
+
+
+def _get_numba():
+    """延迟导入numba，避免拖慢程序启动"""
+    global _numba, _numba_checked
+    if not _numba_checked:
+        _numba_checked = True
+        try:
+            import numba
+            _numba = numba
+        except ImportError:
+            _numba = None
+    return _numba
+
+
+def numba_available() -> bool:
+    """
+    检查numba是否可用
+
+    Returns:
+        是否已安装numba
+    """
+    return _get_numba() is not None
+
+
+def njit(fallback: Callable = None, **options) -> Callable:
+    """
+    可选的numba.njit装饰器
+
+    首次调用时才导入numba并编译；numba未安装或编译失败时回退到
+    fallback（未指定时使用原始Python函数，此时被装饰函数必须是合法的纯Python实现）。
+
+    Args:
+        fallback: 无法JIT时使用的替代实现（如NumPy向量化版本）
+        **options: 传给numba.njit的参数（如cache=True）
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        py_impl = fallback if fallback is not None else func
+        impl = None
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            nonlocal impl
+            if impl is None:
+                numba = _get_numba()
+                impl = numba.njit(**options)(func) if numba is not None else py_impl
+
+            if impl is py_impl:
+                return py_impl(*args)
+
+            try:
+                return impl(*args)
+            except _get_numba().core.errors.NumbaError as e:
+                logger.warning(f"JIT编译失败，使用Python实现: {func.__name__}: {e}")
+                impl = py_impl
+                return py_impl(*args)
+
+        wrapper.py_func = py_impl
+        return wrapper
+
+    return decorator
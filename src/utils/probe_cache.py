@@ -0,0 +1,150 @@
+"""
+媒体探测结果持久化缓存
+使用SQLite保存ffprobe结果，程序重启后同一文件无需再次探测
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class ProbeCache:
+    """ffprobe结果缓存，键为 绝对路径:修改时间(ns):大小"""
+
+    # 最多保留的条目数，超出时按最近访问时间淘汰
+    MAX_ENTRIES = 5000
+
+    def __init__(self, db_path: str, max_entries: int = MAX_ENTRIES):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite数据库文件路径
+            max_entries: 最多保留的条目数
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开连接、建表并清理过期条目（首次使用时）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+            # 旧版表结构没有path/accessed列，无法清理，直接重建
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(probe_cache)')}
+            if columns and 'accessed' not in columns:
+                conn.execute('DROP TABLE probe_cache')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS probe_cache ('
+                'key TEXT PRIMARY KEY, path TEXT NOT NULL, data TEXT NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._prune(conn)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _prune(self, conn: sqlite3.Connection):
+        """删除对应文件已不存在的条目，并按最近访问时间保留至多max_entries条"""
+        rows = conn.execute('SELECT key, path FROM probe_cache').fetchall()
+        stale = [(key,) for key, path in rows if not os.path.exists(path)]
+        if stale:
+            conn.executemany('DELETE FROM probe_cache WHERE key = ?', stale)
+        conn.execute(
+            'DELETE FROM probe_cache WHERE key NOT IN ('
+            'SELECT key FROM probe_cache ORDER BY accessed DESC LIMIT ?)',
+            (self.max_entries,)
+        )
+        if stale:
+            logger.debug(f"已清理 {len(stale)} 条失效的探测缓存")
+
+    @staticmethod
+    def make_key(abs_path: str, mtime_ns: int, size: int) -> str:
+        """
+        生成缓存键
+
+        Args:
+            abs_path: 文件绝对路径
+            mtime_ns: 修改时间（纳秒）
+            size: 文件大小
+
+        Returns:
+            缓存键
+        """
+        return f"{abs_path}:{mtime_ns}:{size}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的信息字典，未命中或出错时返回None
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    'SELECT data FROM probe_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row:
+                    conn.execute('UPDATE probe_cache SET accessed = ? WHERE key = ?',
+                                 (time.time(), key))
+                    conn.commit()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.debug(f"读取探测缓存失败: {e}")
+            return None
+
+    def put(self, key: str, info: Dict, path: str):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            info: 信息字典
+            path: 对应的文件绝对路径（用于清理已删除文件的条目）
+        """
+        try:
+            data = json.dumps(info, ensure_ascii=False)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO probe_cache (key, path, data, accessed) VALUES (?, ?, ?, ?)',
+                    (key, path, data, time.time())
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logger.debug(f"写入探测缓存失败: {e}")
+
+
+# 全局缓存实例
+_probe_cache: Optional[ProbeCache] = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache() -> ProbeCache:
+    """
+    获取全局探测缓存（数据库与配置文件放在同一目录）
+
+    Returns:
+        ProbeCache实例
+    """
+    global _probe_cache
+    if _probe_cache is None:
+        with _probe_cache_lock:
+            if _probe_cache is None:
+                from utils.config import get_config
+                config_dir = Path(get_config().config_file).parent
+                _probe_cache = ProbeCache(str(config_dir / 'probe_cache.db'))
+    return _probe_cache